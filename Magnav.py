@@ -1,14 +1,261 @@
+import os
+
 from manim import *
 import numpy as np
 
+from assets import load_image, load_svg
+from gaussian_field import (
+    GAUSSIANS,
+    IncrementalMixtureGrid,
+    gaussian_density,
+    mixture_grid,
+)
+import preview
+from render_profile import profiled
+from text_cache import cached_text
+
+# magnetic_map.png 가 그려진 좌표 범위 (make_contour.py 와 동일)
+MAP_X_RANGE = (-5, 5)
+MAP_Y_RANGE = (-5, 5)
+
+
+class DashedTrail(VGroup):
+    # path 를 따라 대시를 한 번만 만들어 두고, 진행도에 따라 앞쪽 대시들만 보이게 한다
+    def __init__(self, path, num_dashes=100, **kwargs):
+        super().__init__()
+        self.all_dashes = DashedVMobject(
+            path, num_dashes=num_dashes, **kwargs
+        ).submobjects
+        # 각 대시가 시작하는 path 상의 비율 (equal_lengths 이므로 호 길이 기준으로 균등)
+        self.dash_starts = np.arange(len(self.all_dashes)) / len(self.all_dashes)
+        self.visible_dashes = 0
+
+    def set_proportion(self, alpha):
+        count = (
+            int(np.searchsorted(self.dash_starts, alpha, side="right"))
+            if alpha > 0
+            else 0
+        )
+        if count != self.visible_dashes:
+            self.submobjects = self.all_dashes[:count]
+            self.visible_dashes = count
+        return self
+
 
+class PathLookup:
+    # 베지어 경로를 호 길이 기준으로 균등하게 샘플링한 위치/접선 테이블.
+    # point_from_proportion 처럼 매번 곡선을 훑지 않고 O(1) 로 조회한다.
+    def __init__(self, path, samples_per_curve=64, table_size=2048):
+        curves = np.asarray(path.get_cubic_bezier_tuples(), dtype=float)
+        t = np.linspace(0, 1, samples_per_curve + 1)[:, None, None]
+        p0, p1, p2, p3 = (curves[None, :, i] for i in range(4))
+        # (samples, curves, 3) -> 곡선 순서대로 이어 붙임
+        points = (
+            (1 - t) ** 3 * p0
+            + 3 * (1 - t) ** 2 * t * p1
+            + 3 * (1 - t) * t**2 * p2
+            + t**3 * p3
+        )
+        tangents = (
+            3 * (1 - t) ** 2 * (p1 - p0)
+            + 6 * (1 - t) * t * (p2 - p1)
+            + 3 * t**2 * (p3 - p2)
+        )
+        points = points.transpose(1, 0, 2).reshape(-1, 3)
+        tangents = tangents.transpose(1, 0, 2).reshape(-1, 3)
+
+        lengths = np.concatenate(
+            [[0], np.cumsum(np.linalg.norm(np.diff(points, axis=0), axis=1))]
+        )
+        proportions = (
+            lengths / lengths[-1]
+            if lengths[-1] > 0
+            else np.linspace(0, 1, len(lengths))
+        )
+        # 호 길이 비율이 균등한 테이블로 다시 샘플링
+        self.proportions = np.linspace(0, 1, table_size)
+        self.points = np.stack(
+            [np.interp(self.proportions, proportions, points[:, k]) for k in range(3)],
+            axis=1,
+        )
+        self.tangents = np.stack(
+            [
+                np.interp(self.proportions, proportions, tangents[:, k])
+                for k in range(3)
+            ],
+            axis=1,
+        )
+
+    def _locate(self, alpha):
+        position = np.clip(alpha, 0, 1) * (len(self.proportions) - 1)
+        index = np.minimum(np.floor(position).astype(int), len(self.proportions) - 2)
+        return index, position - index
+
+    def point_from_proportion(self, alpha):
+        index, frac = self._locate(alpha)
+        return (1 - frac) * self.points[index] + frac * self.points[index + 1]
+
+    def tangent_from_proportion(self, alpha):
+        index, frac = self._locate(alpha)
+        return (1 - frac) * self.tangents[index] + frac * self.tangents[index + 1]
+
+
+class AircraftFleet(VGroup):
+    # 하나의 비행기 template 을 복사해 여러 경로에 배치하고,
+    # 모든 비행기의 위치와 방향을 한 번의 배열 연산으로 갱신한다.
+    # template 은 heading 0 (오른쪽) 을 향한 자세여야 한다.
+    def __init__(self, template, lookups, **kwargs):
+        super().__init__(**kwargs)
+        template_family = template.family_members_with_points()
+        self.template_points = (
+            np.concatenate([mob.points for mob in template_family])
+            - template.get_center()
+        )
+        self.splits = np.cumsum([len(mob.points) for mob in template_family])[:-1]
+
+        self.point_table = np.stack([lookup.points for lookup in lookups])
+        self.tangent_table = np.stack([lookup.tangents for lookup in lookups])
+
+        aircraft = [template.copy() for _ in lookups]
+        self.aircraft_families = [
+            plane.family_members_with_points() for plane in aircraft
+        ]
+        self.add(*aircraft)
+
+    def set_proportion(self, alpha):
+        # alpha 는 스칼라 또는 비행기별 진행도 배열
+        count, table_size = self.point_table.shape[:2]
+        alphas = np.broadcast_to(np.clip(alpha, 0, 1), (count,))
+        position = alphas * (table_size - 1)
+        index = np.minimum(np.floor(position).astype(int), table_size - 2)
+        frac = (position - index)[:, None]
+        rows = np.arange(count)
+        points = (1 - frac) * self.point_table[rows, index] + frac * self.point_table[
+            rows, index + 1
+        ]
+        tangents = (1 - frac) * self.tangent_table[
+            rows, index
+        ] + frac * self.tangent_table[rows, index + 1]
+
+        angles = np.arctan2(tangents[:, 1], tangents[:, 0])
+        cos, sin = np.cos(angles), np.sin(angles)
+        rotations = np.zeros((count, 3, 3))
+        rotations[:, 0, 0], rotations[:, 0, 1] = cos, -sin
+        rotations[:, 1, 0], rotations[:, 1, 1] = sin, cos
+        rotations[:, 2, 2] = 1
+        fleet_points = (
+            np.einsum("nij,mj->nmi", rotations, self.template_points)
+            + points[:, None, :]
+        )
+        for family, plane_points in zip(self.aircraft_families, fleet_points):
+            for mob, mob_points in zip(family, np.split(plane_points, self.splits)):
+                mob.points = mob_points
+        return self
+
+
+def load_waypoints_csv(path):
+    # aircraft_id, x, y 열을 갖는 CSV 를 비행기별 (K, 2) 웨이포인트 배열 목록으로 읽는다
+    rows = np.atleast_2d(np.loadtxt(path, delimiter=",", skiprows=1))
+    ids = rows[:, 0]
+    _, first = np.unique(ids, return_index=True)
+    return [rows[ids == ids[i], 1:3] for i in sorted(first)]
+
+
+def map_to_image(xy, image):
+    # 지자기 맵 좌표를 이미지 위의 장면 좌표로 변환
+    xy = np.asarray(xy, dtype=float)
+    u = (xy[:, 0] - MAP_X_RANGE[0]) / (MAP_X_RANGE[1] - MAP_X_RANGE[0])
+    v = (xy[:, 1] - MAP_Y_RANGE[0]) / (MAP_Y_RANGE[1] - MAP_Y_RANGE[0])
+    corner = image.get_corner(DL)
+    return corner + u[:, None] * image.width * RIGHT + v[:, None] * image.height * UP
+
+
+def downsample_rgba(pixel_array):
+    # 2x2 픽셀 평균으로 가로세로 절반 크기의 이미지를 만든다 (홀수 끝 줄은 버림)
+    h, w = pixel_array.shape[0] // 2 * 2, pixel_array.shape[1] // 2 * 2
+    blocks = pixel_array[:h, :w].reshape(h // 2, 2, w // 2, 2, -1)
+    return np.round(blocks.mean(axis=(1, 3))).astype(pixel_array.dtype)
+
+
+class LODImageMobject(ImageMobject):
+    # 해상도를 절반씩 줄인 mipmap 단계들을 미리 만들어 두고, 화면의 세로 범위
+    # (frame_height) 와 출력 해상도 (pixel_height) 에서 보이는 픽셀 수에 맞는 단계를 골라
+    # 카메라에 넘긴다. 모든 단계의 가로세로 비율이 같으므로 mobject 의 모양은 바뀌지 않는다.
+    # 카메라를 확대/축소하는 장면에서는 set_view 로 현재 frame_height 를 알려준다.
+    def __init__(
+        self,
+        filename_or_array,
+        frame_height=None,
+        pixel_height=None,
+        min_level_height=16,
+        **kwargs,
+    ):
+        self.frame_height = frame_height or config.frame_height
+        self.pixel_height = pixel_height or config.pixel_height
+        self.min_level_height = min_level_height
+        super().__init__(filename_or_array, **kwargs)
+        self.build_levels()
+
+    def build_levels(self):
+        self.levels = [self.pixel_array]
+        while min(self.levels[-1].shape[:2]) >= 2 * self.min_level_height:
+            self.levels.append(downsample_rgba(self.levels[-1]))
+        return self
+
+    def set_view(self, frame_height=None, pixel_height=None):
+        self.frame_height = frame_height or self.frame_height
+        self.pixel_height = pixel_height or self.pixel_height
+        return self
+
+    def get_level_index(self):
+        # 이미지 높이가 출력 영상에서 차지하는 픽셀 수
+        screen_height = self.height / self.frame_height * self.pixel_height
+        # 화면 픽셀 수보다 작지 않은 가장 거친 단계 (확대 방향 리샘플링은 피한다)
+        index = 0
+        for k, level in enumerate(self.levels):
+            if level.shape[0] >= screen_height:
+                index = k
+        return index
+
+    def get_pixel_array(self):
+        # ImageMobject.__init__ 의 reset_points 는 levels 를 만들기 전에 호출되고,
+        # FadeIn 등의 보간 중에는 pixel_array 가 새 배열로 바뀌므로 그대로 사용
+        levels = getattr(self, "levels", None)
+        if levels is None or self.pixel_array is not levels[0]:
+            return self.pixel_array
+        return levels[self.get_level_index()]
+
+    def interpolate_color(self, mobject1, mobject2, alpha):
+        super().interpolate_color(mobject1, mobject2, alpha)
+        # 보간이 끝나면 새 pixel_array 로 단계들을 다시 만들어 level-of-detail 을 되살린다
+        if alpha <= 0 or alpha >= 1:
+            self.build_levels()
+        return self
+
+    def set_opacity(self, alpha):
+        super().set_opacity(alpha)
+        for level in self.levels[1:]:
+            level[:, :, 3] = int(255 * alpha)
+        return self
+
+    def discard_finer_levels(self):
+        # 카메라가 더 확대되지 않는 장면에서 지금 필요한 것보다 고운 단계를 버려 메모리를 줄인다
+        self.levels = self.levels[self.get_level_index() :]
+        self.pixel_array = self.levels[0]
+        return self
+
+
+@profiled()
+@preview.previewable
 class MagneticMapScene(Scene):
     def construct(self):
-        magnetic_map_image = ImageMobject("magnetic_map.png")
+        magnetic_map_image = load_image("magnetic_map.png", image_class=LODImageMobject)
         magnetic_map_image.scale_to_fit_height(6)
+        # 카메라가 움직이지 않으므로 출력 해상도에 맞는 단계만 남긴다
+        magnetic_map_image.discard_finer_levels()
         self.add(magnetic_map_image)
 
-        MagneticMapText = Text("Magnetic Map").scale(0.5)
+        MagneticMapText = cached_text("Magnetic Map").scale(0.5)
         MagneticMapText.next_to(magnetic_map_image, UP, buff=0.3)
         self.play(FadeIn(MagneticMapText))
 
@@ -17,16 +264,16 @@ class MagneticMapScene(Scene):
         end_point = magnetic_map_image.get_corner(UR)
         full_path = CubicBezier(start_point, control_point, control_point, end_point)
 
-        airplane = SVGMobject("white_airplane.svg").scale(0.3)
+        airplane = load_svg("white_airplane.svg").scale(0.3)
         airplane.move_to(start_point)
         airplane.rotate(-PI / 4)
         self.add(airplane)
 
-        dashed_path = DashedVMobject(full_path.copy(), num_dashes=100, color=WHITE)
+        dashed_path = DashedTrail(full_path, num_dashes=100, color=WHITE)
         self.add(dashed_path)
 
         original_path_legend_line = Line(ORIGIN, RIGHT * 0.5, color=WHITE)
-        original_path_legend_text = Text("Original Path", font_size=24).next_to(
+        original_path_legend_text = cached_text("Original Path", font_size=24).next_to(
             original_path_legend_line, RIGHT, buff=0.1
         )
 
@@ -35,25 +282,24 @@ class MagneticMapScene(Scene):
 
         self.add(legend_group)
 
+        # section_render.py 가 앞 구간 (지도와 제목) 을 캐시에서 재사용할 수 있도록 구분
+        self.next_section("flight")
         path_tracker = ValueTracker(0)
 
-        dashed_path.add_updater(
-            lambda m: m.become(
-                DashedVMobject(
-                    full_path, num_dashes=100, color=WHITE
-                ).pointwise_become_partial(full_path, 0, path_tracker.get_value())
-            )
-        )
+        def update_dashed_path(mob):
+            mob.set_proportion(path_tracker.get_value())
+
+        dashed_path.add_updater(update_dashed_path)
 
         airplane.previous_angle = 0
+        path_lookup = PathLookup(full_path)
 
         def update_airplane(mob, dt):
             alpha = path_tracker.get_value()
-            new_point = full_path.point_from_proportion(alpha)
+            new_point = path_lookup.point_from_proportion(alpha)
             mob.move_to(new_point)
             if alpha > 0:
-                previous_point = full_path.point_from_proportion(max(0, alpha - 0.01))
-                direction = new_point - previous_point
+                direction = path_lookup.tangent_from_proportion(alpha)
                 new_angle = np.arctan2(direction[1], direction[0])
                 angle_change = new_angle - mob.previous_angle
                 mob.rotate(angle_change)
@@ -63,40 +309,326 @@ class MagneticMapScene(Scene):
 
         self.play(path_tracker.animate.set_value(1), run_time=4, rate_func=linear)
         airplane.remove_updater(update_airplane)
-        dashed_path.remove_updater(lambda m: m)
+        dashed_path.remove_updater(update_dashed_path)
+        self.wait()
+
+
+@profiled()
+class FleetMapScene(Scene):
+    # 여러 비행기의 궤적을 지자기 맵 위에 한꺼번에 표시
+    waypoints_csv = "fleet_waypoints.csv"
+    # CSV 가 없을 때 만드는 예시 궤적 수
+    demo_fleet_size = 200
+
+    def get_waypoints(self):
+        if os.path.exists(self.waypoints_csv):
+            return load_waypoints_csv(self.waypoints_csv)
+        rng = np.random.default_rng(0)
+        starts = rng.uniform(-5, 5, (self.demo_fleet_size, 2))
+        ends = rng.uniform(-5, 5, (self.demo_fleet_size, 2))
+        mids = (starts + ends) / 2 + rng.normal(0, 1.5, (self.demo_fleet_size, 2))
+        return [np.stack(waypoints) for waypoints in zip(starts, mids, ends)]
+
+    def construct(self):
+        magnetic_map_image = load_image("magnetic_map.png", image_class=LODImageMobject)
+        magnetic_map_image.scale_to_fit_height(6)
+        magnetic_map_image.discard_finer_levels()
+        self.add(magnetic_map_image)
+
+        lookups = []
+        for waypoints in self.get_waypoints():
+            path = VMobject().set_points_smoothly(
+                map_to_image(waypoints, magnetic_map_image)
+            )
+            lookups.append(PathLookup(path, table_size=512))
+
+        # SVG 는 한 번만 읽고 heading 0 자세로 맞춘다
+        airplane = load_svg("white_airplane.svg").scale(0.1)
+        airplane.rotate(-PI / 4)
+        fleet = AircraftFleet(airplane, lookups)
+        self.add(fleet)
+
+        path_tracker = ValueTracker(0)
+
+        def update_fleet(mob):
+            mob.set_proportion(path_tracker.get_value())
+
+        fleet.add_updater(update_fleet)
+        self.play(path_tracker.animate.set_value(1), run_time=4, rate_func=linear)
+        fleet.remove_updater(update_fleet)
         self.wait()
 
 
+class LiveMagneticField(ImageMobject):
+    # 가우시안 평균과 공분산을 ValueTracker 로 두고, 매 프레임 바뀐 성분만 다시 계산해
+    # 미리 할당한 pixel_array 의 해당 영역만 색을 다시 칠하는 지자기 맵.
+    # 성분 k 의 파라미터는 trackers[k]["x"], ["y"], ["cov_xx"], ["cov_xy"], ["cov_yy"].
+    def __init__(
+        self,
+        gaussians=GAUSSIANS,
+        x_range=MAP_X_RANGE,
+        y_range=MAP_Y_RANGE,
+        resolution=200,
+        colors=(DARK_BLUE, TEAL, YELLOW),
+        levels=20,
+        value_range=None,
+        # 등고선 색 단계보다 훨씬 작은 exp(-8) 미만의 꼬리는 계산하지 않는다
+        cutoff=4.0,
+        **kwargs,
+    ):
+        self.grid = IncrementalMixtureGrid(
+            gaussians, x_range, y_range, resolution, cutoff=cutoff
+        )
+        ny, nx = self.grid.field.shape
+        super().__init__(np.full((ny, nx, 4), 255, dtype=np.uint8), **kwargs)
+        self.trackers = [
+            {
+                "x": ValueTracker(mean[0]),
+                "y": ValueTracker(mean[1]),
+                "cov_xx": ValueTracker(cov[0][0]),
+                "cov_xy": ValueTracker(cov[0][1]),
+                "cov_yy": ValueTracker(cov[1][1]),
+            }
+            for mean, cov in gaussians
+        ]
+        # 색 범위를 고정해야 바뀐 셀만 다시 칠해도 나머지 색이 맞는다
+        self.value_range = value_range or (0.0, float(self.grid.field.max()))
+        self.levels = levels
+        self.color_table = (
+            np.array([color.to_rgb() for color in color_gradient(colors, levels)]) * 255
+        ).astype(np.uint8)
+        self.recolor(0, ny, 0, nx)
+        self.add_updater(lambda mob: mob.update_field())
+
+    def recolor(self, r0, r1, c0, c1):
+        # 필드의 행 0 은 y 최솟값이고 이미지의 행 0 은 위쪽이므로 뒤집힌 view 에 쓴다
+        low, high = self.value_range
+        values = self.grid.field[r0:r1, c0:c1]
+        bands = ((values - low) / (high - low) * self.levels).astype(int)
+        np.clip(bands, 0, self.levels - 1, out=bands)
+        self.pixel_array[::-1][r0:r1, c0:c1, :3] = self.color_table[bands]
+        return self
+
+    def update_field(self):
+        for k, trackers in enumerate(self.trackers):
+            cov_xy = trackers["cov_xy"].get_value()
+            window = self.grid.set_component(
+                k,
+                (trackers["x"].get_value(), trackers["y"].get_value()),
+                (
+                    (trackers["cov_xx"].get_value(), cov_xy),
+                    (cov_xy, trackers["cov_yy"].get_value()),
+                ),
+            )
+            if window is not None:
+                self.recolor(*window)
+        return self
+
+
+@profiled()
+class LiveMagneticFieldScene(Scene):
+    # 이상체들이 움직이고 퍼지는 동안 지자기 맵을 실시간으로 다시 그린다
+    def construct(self):
+        field = LiveMagneticField()
+        field.scale_to_fit_height(6)
+        self.add(field)
+
+        title = cached_text("Magnetic Anomaly Field").scale(0.5)
+        title.next_to(field, UP, buff=0.3)
+        self.play(FadeIn(title))
+
+        drifts = []
+        for k, trackers in enumerate(field.trackers[:4]):
+            angle = k * PI / 2
+            drifts.append(trackers["x"].animate.increment_value(0.8 * np.cos(angle)))
+            drifts.append(trackers["y"].animate.increment_value(0.8 * np.sin(angle)))
+        self.play(*drifts, run_time=3)
+
+        spreads = [
+            trackers[name].animate.set_value(1.5 * trackers[name].get_value())
+            for trackers in field.trackers[4:8]
+            for name in ("cov_xx", "cov_xy", "cov_yy")
+        ]
+        self.play(*spreads, run_time=3)
+        self.wait()
+
+
+def quad_face_points(corners):
+    # (F, 4, 3) 꼭짓점을 set_points_as_corners 와 같은 배치, 즉 각 변을 직선 3차 베지어로
+    # 나타낸 닫힌 사각형 (F, 16, 3) 으로 변환
+    ends = np.roll(corners, -1, axis=1)
+    segments = np.stack(
+        [
+            corners,
+            corners + (ends - corners) / 3,
+            corners + 2 * (ends - corners) / 3,
+            ends,
+        ],
+        axis=2,
+    )
+    return segments.reshape(len(corners), -1, 3)
+
+
+class BatchedSurface(Surface):
+    # func(u, v) 를 점마다 호출하는 대신 batch_func(u_array, v_array) -> (N, 3) 을
+    # 모든 face 의 점에 대해 한 번만 호출하는 Surface.
+    # face 의 점도 배열로 한꺼번에 만들고, face 객체에는 완성된 점을 대입만 한다.
+    def __init__(self, batch_func, **kwargs):
+        self._batch_func = batch_func
+        super().__init__(
+            lambda u, v: batch_func(np.array([u]), np.array([v]))[0], **kwargs
+        )
+
+    def get_face_points(self):
+        # Surface._setup_in_uv_space 와 apply_function 을 거친 결과와 같은 (F, 16, 3) 배열.
+        # VMobject.apply_function 처럼 handle 을 anchor 쪽으로 당긴 뒤 변환하고 되돌린다.
+        u_values, v_values = self._get_u_values_and_v_values()
+        uu, vv = np.meshgrid(u_values, v_values, indexing="ij")
+        uv = np.stack([uu, vv, np.zeros_like(uu)], axis=-1)
+        corners = np.stack(
+            [uv[:-1, :-1], uv[1:, :-1], uv[1:, 1:], uv[:-1, 1:]], axis=2
+        ).reshape(-1, 4, 3)
+        curves = quad_face_points(corners).reshape(-1, 4, 3)
+
+        factor = self.pre_function_handle_to_anchor_scale_factor
+        anchors_1, anchors_2 = curves[:, 0], curves[:, 3]
+        curves[:, 1] = anchors_1 + factor * (curves[:, 1] - anchors_1)
+        curves[:, 2] = anchors_2 + factor * (curves[:, 2] - anchors_2)
+        flat = curves.reshape(-1, 3)
+        mapped = np.asarray(self._batch_func(flat[:, 0], flat[:, 1]), dtype=float)
+        mapped = mapped.reshape(curves.shape)
+        anchors_1, anchors_2 = mapped[:, 0], mapped[:, 3]
+        mapped[:, 1] = anchors_1 + (mapped[:, 1] - anchors_1) / factor
+        mapped[:, 2] = anchors_2 + (mapped[:, 2] - anchors_2) / factor
+        return mapped.reshape(len(corners), -1, 3)
+
+    def _setup_in_uv_space(self):
+        u_values, v_values = self._get_u_values_and_v_values()
+        v_res = len(v_values) - 1
+        faces = VGroup()
+        for k, face_points in enumerate(self.get_face_points()):
+            face = ThreeDVMobject()
+            face.points = face_points
+            i, j = divmod(k, v_res)
+            face.u_index, face.v_index = i, j
+            face.u1, face.u2 = u_values[i : i + 2]
+            face.v1, face.v2 = v_values[j : j + 2]
+            faces.add(face)
+        faces.set_fill(color=self.fill_color, opacity=self.fill_opacity)
+        faces.set_stroke(
+            color=self.stroke_color,
+            width=self.stroke_width,
+            opacity=self.stroke_opacity,
+        )
+        self.add(*faces)
+        if self.checkerboard_colors:
+            self.set_fill_by_checkerboard(*self.checkerboard_colors)
+        self._skip_pointwise_apply = True
+
+    def apply_function(self, function, **kwargs):
+        # Surface.__init__ 의 점별 apply_function 은 get_face_points 에서 이미 처리했으므로
+        # 한 번 건너뛴다
+        if not getattr(self, "_skip_pointwise_apply", False):
+            return super().apply_function(function, **kwargs)
+        self._skip_pointwise_apply = False
+        if self.make_smooth_after_applying_functions:
+            self.make_smooth()
+        return self
+
+
+class MixtureSurface(VGroup):
+    # 가우시안 혼합의 합을 하나의 height field 메시로 표현.
+    # 정점은 vertices (N, 3), 면은 faces (F, 4) 인덱스 배열로 저장하므로
+    # 면의 개수는 resolution 에만 의존하고 가우시안 개수와는 무관하다.
+    def __init__(
+        self,
+        gaussians,
+        u_range=(-2, 2),
+        v_range=(-2, 2),
+        resolution=24,
+        checkerboard_colors=(ORANGE, BLUE),
+        fill_opacity=0.5,
+        stroke_color=GREEN,
+        stroke_width=0.5,
+        **kwargs,
+    ):
+        super().__init__(**kwargs)
+        u_res, v_res = (
+            (resolution, resolution) if np.isscalar(resolution) else resolution
+        )
+        u_values = np.linspace(*u_range, u_res + 1)
+        v_values = np.linspace(*v_range, v_res + 1)
+        uu, vv = np.meshgrid(u_values, v_values, indexing="ij")
+        # mixture_grid 는 (v, u) 순서의 배열을 반환하므로 전치
+        zz = np.asarray(
+            mixture_grid(gaussians, u_range, v_range, (u_res + 1, v_res + 1))
+        ).T
+        self.vertices = np.stack([uu, vv, zz], axis=-1).reshape(-1, 3)
+
+        index = np.arange(uu.size).reshape(uu.shape)
+        self.faces = np.stack(
+            [index[:-1, :-1], index[1:, :-1], index[1:, 1:], index[:-1, 1:]], axis=-1
+        ).reshape(-1, 4)
+        # 체커보드 색 인덱스 (u_index + v_index) % 2
+        self.face_parity = (
+            np.add.outer(np.arange(u_res), np.arange(v_res)) % 2
+        ).ravel()
+
+        for face_points in self.get_face_points():
+            face = ThreeDVMobject()
+            face.points = face_points
+            self.add(face)
+
+        self.set_stroke(color=stroke_color, width=stroke_width)
+        for parity, color in enumerate(checkerboard_colors):
+            VGroup(*self.get_faces_by_parity(parity)).set_fill(
+                color=color, opacity=fill_opacity
+            )
+
+    def get_face_points(self):
+        return quad_face_points(self.vertices[self.faces])
+
+    def get_faces_by_parity(self, parity):
+        return [
+            face
+            for face, face_parity in zip(self.submobjects, self.face_parity)
+            if face_parity == parity
+        ]
+
+
+@profiled("create_surfaces")
 class ThreeDSurfacePlot(ThreeDScene):
+    # True 이면 가우시안마다 Surface 를 만드는 대신 합쳐진 MixtureSurface 하나를 그린다
+    merged_surface = False
+
     def construct(self):
-        resolution_fa = 24
+        resolution_fa = preview.surface_resolution(24)
         self.set_camera_orientation(phi=75 * DEGREES, theta=-45 * DEGREES)
 
-        gaussians = [
-            (np.array([0, 0]), np.array([[1, 0], [0, 1]])),
-            (np.array([2, 2]), np.array([[0.5, 0.3], [0.3, 0.5]])),
-            (np.array([-2, -1]), np.array([[0.5, 0], [0, 0.5]])),
-            (np.array([1, -3]), np.array([[0.3, -0.1], [-0.1, 0.3]])),
-            (np.array([-3, 2]), np.array([[0.4, 0.3], [0.3, 0.4]])),
-            # 추가된 가우시안 분포들
-            (np.array([3, -2]), np.array([[0.2, 0], [0, 0.2]])),
-            (np.array([-2, 3]), np.array([[0.3, 0.2], [0.2, 0.3]])),
-            (np.array([0, 3]), np.array([[0.4, -0.1], [-0.1, 0.4]])),
-            (np.array([-3, -3]), np.array([[0.5, 0.1], [0.1, 0.5]])),
-            (np.array([3, 3]), np.array([[0.3, 0], [0, 0.3]])),
-            (np.array([-1, 4]), np.array([[0.4, 0.2], [0.2, 0.4]])),
-            (np.array([4, -1]), np.array([[0.6, -0.2], [-0.2, 0.6]])),
-            (np.array([-4, -4]), np.array([[0.3, 0.1], [0.1, 0.3]])),
-            (np.array([4, 4]), np.array([[0.5, -0.1], [-0.1, 0.5]])),
-        ]
+        gaussians = GAUSSIANS
 
         axes = ThreeDAxes()
         self.add(axes)
 
+        self.add(*self.create_surfaces(gaussians, resolution_fa))
+
+    def create_surfaces(self, gaussians, resolution_fa):
+        if self.merged_surface:
+            mixture_plane = MixtureSurface(
+                gaussians,
+                u_range=(-2, 2),
+                v_range=(-2, 2),
+                resolution=resolution_fa,
+            ).scale(2, about_point=ORIGIN)
+            return [mixture_plane]
+
+        surfaces = []
+        # 역공분산은 가우시안마다 한 번만 계산
         for mean, cov in gaussians:
+            inv_cov = np.linalg.inv(cov)
             gauss_plane = (
-                Surface(
-                    lambda u, v: self.param_gauss(u, v, mean, cov),
+                BatchedSurface(
+                    lambda u, v: self.param_gauss_batch(u, v, mean, inv_cov),
                     resolution=(resolution_fa, resolution_fa),
                     v_range=[-2, +2],
                     u_range=[-2, +2],
@@ -105,7 +637,8 @@ class ThreeDSurfacePlot(ThreeDScene):
                 .set_style(fill_opacity=1, stroke_color=GREEN)
                 .set_fill_by_checkerboard(ORANGE, BLUE, opacity=0.5)
             )
-            self.add(gauss_plane)
+            surfaces.append(gauss_plane)
+        return surfaces
 
     def param_gauss(self, u, v, mean, cov):
         x, y = u, v
@@ -114,3 +647,13 @@ class ThreeDSurfacePlot(ThreeDScene):
         inv_cov = np.linalg.inv(cov)
         z = np.exp(-0.5 * (diff.T @ inv_cov @ diff))
         return np.array([x, y, z])
+
+    def param_gauss_batch(self, u, v, mean, inv_cov):
+        # u, v 배열 전체에 대해 param_gauss 를 한 번에 계산
+        u = np.asarray(u, dtype=float)
+        v = np.asarray(v, dtype=float)
+        return np.stack([u, v, gaussian_density(u, v, mean, inv_cov)], axis=-1)
+
+
+class MergedSurfacePlot(ThreeDSurfacePlot):
+    merged_surface = True
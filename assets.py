@@ -0,0 +1,182 @@
+# 장면에서 쓰는 이미지/SVG 자산을 미리 처리해 두고 빠르게 불러온다.
+#
+# build_assets(source_dir) 는 디렉터리의 자산을 프로세스 풀에서 병렬로 처리한다.
+#   - *.svg : SVGMobject 로 한 번 파싱하고, 길이가 0 인 곡선을 제거한 점/스타일 배열을 .npz 로 저장
+#   - *.png : 장면이 load_image 로 읽는 이미지 (SCENE_IMAGES) 만 디코딩한 RGBA 배열을
+#             .npy 로 저장. 세로가 MAX_IMAGE_HEIGHT 보다 크면 그 크기로 줄여 저장한다.
+# 내용 해시가 manifest 와 같은 파일은 다시 처리하지 않는다.
+# 처리에 실패한 파일은 건너뛰고, 성공한 파일만 manifest 에 기록한다.
+#
+# 장면에서는 load_svg / load_image 를 쓰면 처리된 결과가 있을 때 그것을 읽고,
+# 없거나 원본이 바뀌었으면 SVGMobject / ImageMobject 로 그대로 읽는다.
+import hashlib
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+ASSET_DIR = Path(__file__).resolve().parent / ".asset_cache"
+MANIFEST_NAME = "manifest.json"
+# 처리 방식이 바뀌면 올려서 기존 결과를 무효화한다
+PIPELINE_VERSION = 3
+# 장면에서 load_image 로 읽는 PNG. 그 밖의 PNG 는 디코딩해 두지 않는다
+SCENE_IMAGES = ("magnetic_map.png",)
+# 4K 출력의 세로 픽셀 수. 화면 전체를 채워도 이보다 큰 해상도는 보이지 않는다
+MAX_IMAGE_HEIGHT = 2160
+
+
+def file_hash(path):
+    digest = hashlib.sha256(f"v{PIPELINE_VERSION}".encode())
+    with open(path, "rb") as fp:
+        for chunk in iter(lambda: fp.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()[:32]
+
+
+def _read_manifest(out_dir):
+    path = Path(out_dir) / MANIFEST_NAME
+    return json.loads(path.read_text()) if path.exists() else {}
+
+
+def _write_manifest(out_dir, manifest):
+    path = Path(out_dir) / MANIFEST_NAME
+    tmp_path = path.with_name(f"{MANIFEST_NAME}.{os.getpid()}.tmp")
+    tmp_path.write_text(json.dumps(manifest, indent=2, sort_keys=True))
+    os.replace(tmp_path, path)
+
+
+def simplify_points(points, tolerance=1e-6):
+    # 네 점이 모두 시작점과 같은 (길이 0) 3차 베지어 곡선을 제거
+    curves = points.reshape(-1, 4, 3)
+    extent = np.abs(curves - curves[:, :1]).max(axis=(1, 2))
+    return curves[extent > tolerance].reshape(-1, 3)
+
+
+def preparse_svg(svg_path, npz_path):
+    from manim import SVGMobject
+
+    mobjects = SVGMobject(str(svg_path)).family_members_with_points()
+    points = [simplify_points(mob.points) for mob in mobjects]
+    np.savez_compressed(
+        npz_path,
+        points=np.concatenate(points) if points else np.zeros((0, 3)),
+        splits=np.cumsum([len(p) for p in points])[:-1],
+        fill_colors=np.array([mob.get_fill_color().to_hex() for mob in mobjects]),
+        fill_opacities=np.array([mob.get_fill_opacity() for mob in mobjects]),
+        stroke_colors=np.array([mob.get_stroke_color().to_hex() for mob in mobjects]),
+        stroke_opacities=np.array([mob.get_stroke_opacity() for mob in mobjects]),
+        stroke_widths=np.array([mob.get_stroke_width() for mob in mobjects]),
+    )
+
+
+def predecode_png(png_path, npy_path, max_height=MAX_IMAGE_HEIGHT):
+    from PIL import Image
+
+    image = Image.open(png_path).convert("RGBA")
+    if image.height > max_height:
+        width = max(1, round(image.width * max_height / image.height))
+        image = image.resize((width, max_height), Image.LANCZOS)
+    np.save(npy_path, np.array(image))
+
+
+def process_asset(source_path, out_dir):
+    # 한 자산을 처리하고 (이름, 해시, 출력 파일 목록) 을 반환
+    source_path = Path(source_path)
+    out_dir = Path(out_dir)
+    outputs = []
+    if source_path.suffix == ".svg":
+        target = out_dir / f"{source_path.name}.npz"
+        preparse_svg(source_path, target)
+        outputs.append(target.name)
+    elif source_path.suffix == ".png":
+        target = out_dir / f"{source_path.name}.npy"
+        predecode_png(source_path, target)
+        outputs.append(target.name)
+    return source_path.name, file_hash(source_path), outputs
+
+
+def build_assets(source_dir, out_dir=ASSET_DIR, processes=None, images=SCENE_IMAGES):
+    source_dir = Path(source_dir)
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    manifest = _read_manifest(out_dir)
+
+    pending = []
+    for source_path in sorted(source_dir.glob("*")):
+        if source_path.suffix not in (".svg", ".png"):
+            continue
+        if source_path.suffix == ".png" and source_path.name not in images:
+            continue
+        entry = manifest.get(source_path.name)
+        if (
+            entry
+            and entry["hash"] == file_hash(source_path)
+            and all((out_dir / name).exists() for name in entry["outputs"])
+        ):
+            continue
+        pending.append(source_path)
+
+    processed = []
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        futures = {
+            source_path: executor.submit(process_asset, source_path, out_dir)
+            for source_path in pending
+        }
+        for source_path, future in futures.items():
+            try:
+                name, digest, outputs = future.result()
+            except Exception as error:
+                # 한 파일의 실패가 나머지 파일의 manifest 기록을 막지 않도록 한다
+                print(f"failed: {source_path.name}: {error}", file=sys.stderr)
+                manifest.pop(source_path.name, None)
+                continue
+            manifest[name] = {"hash": digest, "outputs": outputs}
+            processed.append(name)
+    _write_manifest(out_dir, manifest)
+    return processed
+
+
+def _processed_path(source_path, suffix, out_dir):
+    # 원본 내용이 manifest 에 기록된 것과 같을 때만 처리된 파일 경로를 반환
+    source_path = Path(source_path)
+    entry = _read_manifest(out_dir).get(source_path.name)
+    target = Path(out_dir) / f"{source_path.name}{suffix}"
+    if entry is None or not target.exists() or entry["hash"] != file_hash(source_path):
+        return None
+    return target
+
+
+def load_svg(path, out_dir=ASSET_DIR):
+    from manim import SVGMobject, VGroup, VMobject
+
+    processed = _processed_path(path, ".npz", out_dir)
+    if processed is None:
+        return SVGMobject(str(path))
+
+    data = np.load(processed)
+    group = VGroup()
+    for k, points in enumerate(np.split(data["points"], data["splits"])):
+        mob = VMobject()
+        mob.points = points
+        mob.set_fill(str(data["fill_colors"][k]), float(data["fill_opacities"][k]))
+        mob.set_stroke(
+            str(data["stroke_colors"][k]),
+            float(data["stroke_widths"][k]),
+            float(data["stroke_opacities"][k]),
+        )
+        group.add(mob)
+    return group
+
+
+def load_image(path, out_dir=ASSET_DIR, image_class=None, **kwargs):
+    # image_class 로 ImageMobject 의 하위 클래스 (LODImageMobject 등) 를 지정할 수 있다
+    if image_class is None:
+        from manim import ImageMobject as image_class
+
+    processed = _processed_path(path, ".npy", out_dir)
+    if processed is None:
+        return image_class(str(path), **kwargs)
+    return image_class(np.load(processed), **kwargs)
@@ -0,0 +1,246 @@
+# 장면 렌더링과 주요 커널의 실행 시간을 측정하고 기준값과 비교한다.
+#
+#   python benchmark.py --save-baseline      # 현재 결과를 benchmark_baseline.json 에 저장
+#   python benchmark.py                      # 기준값과 비교해 느려진 항목을 표시 (있으면 종료 코드 1)
+#   python benchmark.py --kernels-only       # 장면 렌더링은 건너뛰고 커널만 측정
+#
+# 장면은 미리보기 없이 subprocess 로 렌더링하므로 화면이 없는 리눅스 서버에서도 실행된다.
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent
+BASELINE_PATH = ROOT / "benchmark_baseline.json"
+
+GRID_RESOLUTIONS = (100, 400, 1000)
+GAUSSIAN_COUNTS = (14, 100)
+SURFACE_RESOLUTIONS = (24, 100)
+IMAGE_SIZES = (16, 64, 256)
+# LiveMagneticField 의 한 프레임: 움직이는 성분 수별 갱신 시간 (60 fps 이면 16.7ms 이내)
+LIVE_FIELD_MOVING = (1, 4, 14)
+SCENES = (
+    ("Magnav.py", "MagneticMapScene"),
+    ("Magnav.py", "LiveMagneticFieldScene"),
+    ("Magnav.py", "ThreeDSurfacePlot"),
+    ("paper/paper.py", "ImageScene"),
+)
+QUALITIES = ("l", "h")
+
+
+def make_gaussians(count, seed=0):
+    # 앞의 14개는 지자기 맵의 가우시안, 나머지는 같은 범위의 임의 분포
+    from gaussian_field import GAUSSIANS
+
+    rng = np.random.default_rng(seed)
+    gaussians = list(GAUSSIANS[:count])
+    while len(gaussians) < count:
+        a = rng.uniform(0.2, 0.6)
+        b = rng.uniform(-0.1, 0.1)
+        gaussians.append((rng.uniform(-5, 5, 2), np.array([[a, b], [b, a]])))
+    return gaussians
+
+
+def measure(func, repeat=3):
+    # 가장 빠른 실행 시간을 기록 (다른 프로세스의 간섭을 줄이기 위해)
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench_generate_gaussian(results, repeat):
+    from make_contour import generate_gaussian
+
+    for resolution in GRID_RESOLUTIONS:
+        x, y = np.meshgrid(
+            np.linspace(-5, 5, resolution), np.linspace(-5, 5, resolution)
+        )
+        for count in GAUSSIAN_COUNTS:
+            gaussians = make_gaussians(count)
+
+            def run():
+                magnetic_map = np.zeros(x.shape)
+                for mean, covariance in gaussians:
+                    magnetic_map += generate_gaussian(x, y, mean, covariance)
+
+            results[f"generate_gaussian[res={resolution},n={count}]"] = measure(
+                run, repeat
+            )
+
+
+def bench_param_gauss(results, repeat):
+    from Magnav import ThreeDSurfacePlot
+
+    # construct 없이 메서드만 쓰므로 Scene 초기화를 건너뛴다
+    plot = object.__new__(ThreeDSurfacePlot)
+    for resolution in SURFACE_RESOLUTIONS:
+        u, v = np.meshgrid(
+            np.linspace(-2, 2, resolution + 1), np.linspace(-2, 2, resolution + 1)
+        )
+        u, v = u.ravel(), v.ravel()
+        for count in GAUSSIAN_COUNTS:
+            gaussians = make_gaussians(count)
+
+            def run_pointwise():
+                for mean, cov in gaussians:
+                    for u_k, v_k in zip(u, v):
+                        plot.param_gauss(u_k, v_k, mean, cov)
+
+            def run_batch():
+                for mean, cov in gaussians:
+                    plot.param_gauss_batch(u, v, mean, np.linalg.inv(cov))
+
+            results[f"param_gauss[res={resolution},n={count}]"] = measure(
+                run_pointwise, 1
+            )
+            results[f"param_gauss_batch[res={resolution},n={count}]"] = measure(
+                run_batch, repeat
+            )
+
+
+def bench_create_pixel_grid_patch(results, repeat):
+    sys.path.insert(0, str(ROOT / "paper"))
+    from paper import ImageScene
+
+    scene = object.__new__(ImageScene)
+    scene.image_height = 3
+    rng = np.random.default_rng(0)
+    for size in IMAGE_SIZES:
+        # 픽셀 아트처럼 색 수가 적은 이미지
+        palette = rng.integers(0, 256, (8, 3))
+        image = palette[rng.integers(0, len(palette), (size, size))]
+        results[f"create_pixel_grid_patch[size={size}]"] = measure(
+            lambda: scene.create_pixel_grid_patch(image), repeat
+        )
+
+
+def bench_live_field(results, repeat):
+    from gaussian_field import GAUSSIANS, IncrementalMixtureGrid
+
+    grid = IncrementalMixtureGrid(GAUSSIANS, resolution=200, cutoff=4.0)
+    for moving in LIVE_FIELD_MOVING:
+        frames = iter(range(1, 10**9))
+
+        def run():
+            step = 0.01 * next(frames)
+            for k, (mean, cov) in enumerate(GAUSSIANS[:moving]):
+                grid.set_component(k, mean + step, cov)
+
+        results[f"live_field_frame[res=200,moving={moving}]"] = measure(run, repeat)
+
+
+def bench_scenes(results, failures):
+    # 한 장면이 실패해도 나머지 장면은 계속 측정하고, 실패한 항목을 failures 에 남긴다
+    for scene_file, scene_name in SCENES:
+        scene_path = ROOT / scene_file
+        for quality in QUALITIES:
+            name = f"render[{scene_name},q={quality}]"
+            start = time.perf_counter()
+            try:
+                subprocess.run(
+                    [
+                        sys.executable,
+                        "-m",
+                        "manim",
+                        "render",
+                        f"-q{quality}",
+                        "--disable_caching",
+                        "--progress_bar",
+                        "none",
+                        scene_path.name,
+                        scene_name,
+                    ],
+                    cwd=scene_path.parent,
+                    check=True,
+                    stdout=subprocess.DEVNULL,
+                )
+            except subprocess.CalledProcessError as error:
+                print(f"failed: {name}: {error}", file=sys.stderr)
+                failures.append(name)
+                continue
+            results[name] = time.perf_counter() - start
+
+
+def run_benchmarks(kernels_only=False, repeat=3):
+    # (결과, 실행하지 못한 항목 목록) 을 반환
+    results = {}
+    failures = []
+    benches = [
+        ("generate_gaussian", lambda: bench_generate_gaussian(results, repeat)),
+        ("param_gauss", lambda: bench_param_gauss(results, repeat)),
+        (
+            "create_pixel_grid_patch",
+            lambda: bench_create_pixel_grid_patch(results, repeat),
+        ),
+        ("live_field_frame", lambda: bench_live_field(results, repeat)),
+    ]
+    if not kernels_only:
+        benches.append(("render", lambda: bench_scenes(results, failures)))
+    for name, bench in benches:
+        try:
+            bench()
+        except ImportError as error:
+            # manim 등이 없는 환경에서는 해당 항목을 건너뛰고 실패로 기록한다
+            print(f"skipped: {name}: {error}", file=sys.stderr)
+            failures.append(name)
+    return results, failures
+
+
+def compare(results, baseline, tolerance):
+    # 기준값보다 tolerance 이상 느려진 항목 목록을 반환
+    regressions = []
+    for name, seconds in sorted(results.items()):
+        before = baseline.get(name)
+        if before is None:
+            status = "new"
+        else:
+            ratio = seconds / before
+            status = f"{ratio:.2f}x"
+            if ratio > 1 + tolerance:
+                status += "  REGRESSION"
+                regressions.append(name)
+        print(f"{seconds:10.4f}s  {status:<20} {name}")
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--baseline", default=str(BASELINE_PATH))
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--kernels-only", action="store_true")
+    parser.add_argument("--repeat", type=int, default=3)
+    # 기준값 대비 허용하는 느려짐 비율
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    args = parser.parse_args()
+
+    os.chdir(ROOT)
+    sys.path.insert(0, str(ROOT))
+    results, failures = run_benchmarks(args.kernels_only, args.repeat)
+
+    baseline_path = Path(args.baseline)
+    baseline = json.loads(baseline_path.read_text()) if baseline_path.exists() else {}
+    if args.save_baseline:
+        if failures:
+            # 빠진 항목이 있는 기준값은 이후 비교에서 회귀를 놓치게 하므로 저장하지 않는다
+            print(
+                f"not saving baseline, failed: {', '.join(failures)}", file=sys.stderr
+            )
+            sys.exit(1)
+        # --kernels-only 이면 기존 기준값의 장면 항목은 그대로 둔다
+        saved = {**baseline, **results} if args.kernels_only else results
+        baseline_path.write_text(json.dumps(saved, indent=2, sort_keys=True))
+        print(f"saved {len(results)} results to {baseline_path}")
+    else:
+        regressions = compare(results, baseline, args.tolerance)
+        for name in failures:
+            print(f"{'':>10}   {'FAILED':<20} {name}")
+        if regressions or failures:
+            sys.exit(1)
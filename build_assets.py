@@ -0,0 +1,19 @@
+# 자산 전처리
+#
+#   python build_assets.py [source_dir] [--images magnetic_map.png ...]
+#
+# 장면에서 빠르게 읽을 수 있도록 디렉터리의 svg 는 미리 파싱한 점 배열로,
+# 장면이 읽는 png 는 디코딩한 픽셀 배열로 저장 (바뀐 파일만 처리)
+import argparse
+
+from assets import ASSET_DIR, SCENE_IMAGES, build_assets
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("source_dir", nargs="?", default=".")
+    parser.add_argument("--out", default=str(ASSET_DIR))
+    parser.add_argument("--processes", type=int, default=None)
+    parser.add_argument("--images", nargs="+", default=list(SCENE_IMAGES))
+    args = parser.parse_args()
+    for name in build_assets(args.source_dir, args.out, args.processes, args.images):
+        print(f"processed {name}")
@@ -0,0 +1,344 @@
+import hashlib
+import os
+from pathlib import Path
+
+import numpy as np
+
+# 지자기 맵을 구성하는 가우시안 분포들의 평균과 공분산
+GAUSSIANS = [
+    (np.array([0, 0]), np.array([[1, 0], [0, 1]])),
+    (np.array([2, 2]), np.array([[0.5, 0.3], [0.3, 0.5]])),
+    (np.array([-2, -1]), np.array([[0.5, 0], [0, 0.5]])),
+    (np.array([1, -3]), np.array([[0.3, -0.1], [-0.1, 0.3]])),
+    (np.array([-3, 2]), np.array([[0.4, 0.3], [0.3, 0.4]])),
+    # 추가된 가우시안 분포들
+    (np.array([3, -2]), np.array([[0.2, 0], [0, 0.2]])),
+    (np.array([-2, 3]), np.array([[0.3, 0.2], [0.2, 0.3]])),
+    (np.array([0, 3]), np.array([[0.4, -0.1], [-0.1, 0.4]])),
+    (np.array([-3, -3]), np.array([[0.5, 0.1], [0.1, 0.5]])),
+    (np.array([3, 3]), np.array([[0.3, 0], [0, 0.3]])),
+    (np.array([-1, 4]), np.array([[0.4, 0.2], [0.2, 0.4]])),
+    (np.array([4, -1]), np.array([[0.6, -0.2], [-0.2, 0.6]])),
+    (np.array([-4, -4]), np.array([[0.3, 0.1], [0.1, 0.3]])),
+    (np.array([4, 4]), np.array([[0.5, -0.1], [-0.1, 0.5]])),
+]
+
+# 계산된 필드를 저장하는 디렉터리
+CACHE_DIR = Path(__file__).resolve().parent / ".field_cache"
+
+# exp(-0.5 * r^2) 가 float64 epsilon 보다 작아지는 마할라노비스 거리
+DEFAULT_CUTOFF = float(np.sqrt(-2 * np.log(np.finfo(np.float64).eps)))
+
+
+def gaussian_density(x, y, mean, inv_cov):
+    # 정규화되지 않은 가우시안 exp(-0.5 * d^T Σ^-1 d) 를 x, y 배열 전체에 대해 계산
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    diff = np.stack([x - mean[0], y - mean[1]], axis=-1)
+    exp_term = np.einsum("...k,kl,...l->...", diff, inv_cov, diff)
+    return np.exp(-0.5 * exp_term)
+
+
+def prepare_gaussians(gaussians):
+    # 역공분산을 가우시안마다 한 번만 계산해 (mean, inv_cov) 목록으로 반환
+    return [
+        (np.asarray(mean, dtype=float), np.linalg.inv(np.asarray(cov, dtype=float)))
+        for mean, cov in gaussians
+    ]
+
+
+def mixture_density(x, y, gaussians):
+    # 모든 가우시안 분포의 합
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    field = np.zeros(np.broadcast(x, y).shape)
+    for mean, inv_cov in prepare_gaussians(gaussians):
+        field += gaussian_density(x, y, mean, inv_cov)
+    return field
+
+
+def load_gaussians_csv(path):
+    # 측량 데이터의 이상체 목록: mean_x, mean_y, cov_xx, cov_xy, cov_yy 열을 갖는 CSV
+    rows = np.atleast_2d(np.loadtxt(path, delimiter=",", skiprows=1))
+    return [
+        (np.array([mx, my]), np.array([[cxx, cxy], [cxy, cyy]]))
+        for mx, my, cxx, cxy, cyy in rows[:, :5]
+    ]
+
+
+class ComponentIndex:
+    # 각 가우시안을 마할라노비스 거리 cutoff 의 bounding box 로 자르고,
+    # 그 박스들을 균일한 버킷 격자에 등록하는 공간 인덱스
+    def __init__(self, gaussians, cutoff=DEFAULT_CUTOFF, cell_size=None):
+        prepared = prepare_gaussians(gaussians)
+        self.cutoff = cutoff
+        self.means = np.array([mean for mean, _ in prepared]).reshape(-1, 2)
+        self.inv_covs = np.array([inv_cov for _, inv_cov in prepared]).reshape(-1, 2, 2)
+        covs = np.array([np.asarray(cov, dtype=float) for _, cov in gaussians])
+        # d^T Σ^-1 d <= r^2 인 타원의 축 방향 반폭은 r * sqrt(Σ_ii)
+        half_widths = cutoff * np.sqrt(np.diagonal(covs, axis1=1, axis2=2)).reshape(
+            -1, 2
+        )
+        self.boxes = np.concatenate(
+            [self.means - half_widths, self.means + half_widths], axis=1
+        )  # (K, 4): x_min, y_min, x_max, y_max
+
+        if cell_size is None:
+            cell_size = float(np.median(2 * half_widths)) if len(half_widths) else 1.0
+        self.cell_size = cell_size
+        self.buckets = {}
+        for k, cells in enumerate(self._cell_ranges(self.boxes)):
+            for cell in cells:
+                self.buckets.setdefault(cell, []).append(k)
+
+    def _cell_ranges(self, boxes):
+        lower = np.floor(boxes[:, :2] / self.cell_size).astype(int)
+        upper = np.floor(boxes[:, 2:] / self.cell_size).astype(int)
+        for (i0, j0), (i1, j1) in zip(lower, upper):
+            yield [(i, j) for i in range(i0, i1 + 1) for j in range(j0, j1 + 1)]
+
+    def query(self, x_min, y_min, x_max, y_max):
+        # 주어진 영역과 박스가 겹치는 성분의 인덱스
+        box = np.array([[x_min, y_min, x_max, y_max]], dtype=float)
+        candidates = set()
+        for cell in next(self._cell_ranges(box)):
+            candidates.update(self.buckets.get(cell, ()))
+        candidates = np.array(sorted(candidates), dtype=int)
+        if len(candidates) == 0:
+            return candidates
+        boxes = self.boxes[candidates]
+        overlaps = (
+            (boxes[:, 0] <= x_max)
+            & (boxes[:, 2] >= x_min)
+            & (boxes[:, 1] <= y_max)
+            & (boxes[:, 3] >= y_min)
+        )
+        return candidates[overlaps]
+
+
+def box_window(x_values, y_values, box):
+    # (x_min, y_min, x_max, y_max) 박스 안에 들어오는 격자 셀의 (r0, r1, c0, c1) 범위
+    x_min, y_min, x_max, y_max = box
+    return (
+        int(np.searchsorted(y_values, y_min, side="left")),
+        int(np.searchsorted(y_values, y_max, side="right")),
+        int(np.searchsorted(x_values, x_min, side="left")),
+        int(np.searchsorted(x_values, x_max, side="right")),
+    )
+
+
+def mixture_density_truncated(x_values, y_values, index):
+    # 정렬된 격자 축 위에서, 각 성분의 bounding box 안의 셀만 계산해 더한다.
+    # 비용은 성분 수 x 셀 수가 아니라 성분들이 덮는 넓이에 비례한다.
+    field = np.zeros((len(y_values), len(x_values)))
+    for k in index.query(x_values[0], y_values[0], x_values[-1], y_values[-1]):
+        r0, r1, c0, c1 = box_window(x_values, y_values, index.boxes[k])
+        if c0 >= c1 or r0 >= r1:
+            continue
+        x, y = np.meshgrid(x_values[c0:c1], y_values[r0:r1])
+        field[r0:r1, c0:c1] += gaussian_density(x, y, index.means[k], index.inv_covs[k])
+    return field
+
+
+class IncrementalMixtureGrid:
+    # 성분별 기여를 bounding box 안의 조각으로 따로 저장해 두고,
+    # 파라미터가 바뀐 성분만 이전 조각을 빼고 새 조각을 더해 필드를 갱신한다.
+    # 갱신 비용은 전체 격자가 아니라 바뀐 성분들의 박스 넓이에 비례한다.
+    def __init__(
+        self,
+        gaussians=GAUSSIANS,
+        x_range=(-5, 5),
+        y_range=(-5, 5),
+        resolution=200,
+        cutoff=DEFAULT_CUTOFF,
+    ):
+        self.x_values, self.y_values = grid_axes(x_range, y_range, resolution)
+        self.cutoff = cutoff
+        self.field = np.zeros((len(self.y_values), len(self.x_values)))
+        self.params = [None] * len(gaussians)
+        self.windows = [(0, 0, 0, 0)] * len(gaussians)
+        self.patches = [np.zeros((0, 0))] * len(gaussians)
+        for k, (mean, cov) in enumerate(gaussians):
+            self.set_component(k, mean, cov)
+
+    def set_component(self, k, mean, cov):
+        # 바뀐 셀 범위 (r0, r1, c0, c1) 를 반환. 파라미터가 그대로면 None
+        mean = np.asarray(mean, dtype=float)
+        cov = np.asarray(cov, dtype=float)
+        if self.params[k] is not None and (
+            np.array_equal(mean, self.params[k][0])
+            and np.array_equal(cov, self.params[k][1])
+        ):
+            return None
+
+        old = self.windows[k]
+        self.field[old[0] : old[1], old[2] : old[3]] -= self.patches[k]
+
+        half_widths = self.cutoff * np.sqrt(np.diagonal(cov))
+        new = box_window(
+            self.x_values,
+            self.y_values,
+            np.concatenate([mean - half_widths, mean + half_widths]),
+        )
+        r0, r1, c0, c1 = new
+        x, y = np.meshgrid(self.x_values[c0:c1], self.y_values[r0:r1])
+        patch = gaussian_density(x, y, mean, np.linalg.inv(cov))
+        self.field[r0:r1, c0:c1] += patch
+
+        self.params[k] = (mean, cov)
+        self.windows[k] = new
+        self.patches[k] = patch
+        if old[0] >= old[1] or old[2] >= old[3]:
+            return new
+        # 이전 박스와 새 박스를 모두 덮는 범위
+        return (
+            min(old[0], r0),
+            max(old[1], r1),
+            min(old[2], c0),
+            max(old[3], c1),
+        )
+
+    def refresh(self):
+        # 빼고 더하기를 반복하며 쌓인 반올림 오차를 저장된 조각들로 다시 합산해 없앤다
+        self.field[:] = 0
+        for (r0, r1, c0, c1), patch in zip(self.windows, self.patches):
+            self.field[r0:r1, c0:c1] += patch
+
+
+def grid_axes(x_range, y_range, resolution):
+    # resolution 은 정수 또는 (nx, ny)
+    nx, ny = (resolution, resolution) if np.isscalar(resolution) else resolution
+    return np.linspace(*x_range, nx), np.linspace(*y_range, ny)
+
+
+def field_key(gaussians, x_range, y_range, resolution, cutoff=None):
+    # 평균, 공분산, 그리드 범위와 해상도 (그리고 cutoff) 로 만든 내용 해시
+    digest = hashlib.sha256()
+    for mean, cov in gaussians:
+        digest.update(np.asarray(mean, dtype=np.float64).tobytes())
+        digest.update(np.asarray(cov, dtype=np.float64).tobytes())
+    x_values, y_values = grid_axes(x_range, y_range, resolution)
+    for values in (x_values, y_values):
+        digest.update(np.array([values[0], values[-1], len(values)]).tobytes())
+    if cutoff is not None:
+        digest.update(np.float64(cutoff).tobytes())
+    return digest.hexdigest()[:32]
+
+
+def mixture_grid(
+    gaussians=GAUSSIANS,
+    x_range=(-5, 5),
+    y_range=(-5, 5),
+    resolution=100,
+    cache=True,
+    cache_dir=CACHE_DIR,
+    cutoff=None,
+):
+    # np.meshgrid(x, y) 와 같은 (ny, nx) 배열을 반환한다.
+    # 캐시가 있으면 읽기 전용 memmap 으로 불러오고 다시 계산하지 않는다.
+    # cutoff 를 주면 각 성분을 그 마할라노비스 거리 안에서만 계산한다.
+    cache_path = Path(cache_dir) / (
+        field_key(gaussians, x_range, y_range, resolution, cutoff) + ".npy"
+    )
+    if cache and cache_path.exists():
+        return np.load(cache_path, mmap_mode="r")
+
+    x_values, y_values = grid_axes(x_range, y_range, resolution)
+    if cutoff is not None:
+        field = mixture_density_truncated(
+            x_values, y_values, ComponentIndex(gaussians, cutoff)
+        )
+    else:
+        x, y = np.meshgrid(x_values, y_values)
+        field = mixture_density(x, y, gaussians)
+
+    if cache:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        # 동시에 렌더링하는 프로세스가 반쯤 쓰인 파일을 읽지 않도록 교체 방식으로 저장
+        tmp_path = cache_path.with_name(f"{cache_path.stem}.{os.getpid()}.tmp.npy")
+        np.save(tmp_path, field)
+        os.replace(tmp_path, cache_path)
+    return field
+
+
+def iter_tiles(shape, tile_size):
+    # (row, col, height, width) 블록을 행 우선으로 생성
+    rows, cols = shape
+    for row in range(0, rows, tile_size):
+        for col in range(0, cols, tile_size):
+            yield row, col, min(tile_size, rows - row), min(tile_size, cols - col)
+
+
+def _fill_tile(args):
+    # 워커 프로세스에서 memmap 을 열어 한 블록만 계산해 기록.
+    # components 가 ComponentIndex 이면 블록과 겹치는 성분만 잘린 범위에서 계산한다.
+    path, components, x_values, y_values, row, col = args
+    if isinstance(components, ComponentIndex):
+        tile = mixture_density_truncated(x_values, y_values, components)
+    else:
+        x, y = np.meshgrid(x_values, y_values)
+        tile = mixture_density(x, y, components)
+    field = np.load(path, mmap_mode="r+")
+    field[row : row + len(y_values), col : col + len(x_values)] = tile
+    field.flush()
+
+
+def mixture_grid_tiled(
+    gaussians=GAUSSIANS,
+    x_range=(-5, 5),
+    y_range=(-5, 5),
+    resolution=8192,
+    output_path=None,
+    tile_size=1024,
+    processes=None,
+    dtype=np.float32,
+    cutoff=None,
+):
+    # mixture_grid 와 같은 (ny, nx) 필드를 블록 단위로 memmap 파일에 기록한다.
+    # 최대 메모리는 전체 그리드가 아니라 tile_size^2 에 비례한다.
+    # processes 가 2 이상이면 블록을 프로세스 풀에 나눠 계산한다.
+    # 기존 파일은 옆의 <이름>.key 에 기록된 필드 키가 같을 때만 재사용한다.
+    digest = field_key(gaussians, x_range, y_range, resolution, cutoff)
+    key = f"{digest}-{np.dtype(dtype).name}"
+    if output_path is None:
+        output_path = CACHE_DIR / f"{digest}.{np.dtype(dtype).name}.npy"
+    output_path = Path(output_path)
+    key_path = output_path.with_name(f"{output_path.name}.key")
+    if output_path.exists() and key_path.exists() and key_path.read_text() == key:
+        return np.load(output_path, mmap_mode="r")
+
+    x_values, y_values = grid_axes(x_range, y_range, resolution)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = output_path.with_name(f"{output_path.stem}.{os.getpid()}.tmp.npy")
+    field = np.lib.format.open_memmap(
+        tmp_path, mode="w+", dtype=dtype, shape=(len(y_values), len(x_values))
+    )
+    del field
+
+    components = gaussians if cutoff is None else ComponentIndex(gaussians, cutoff)
+    tasks = [
+        (
+            tmp_path,
+            components,
+            x_values[col : col + width],
+            y_values[row : row + height],
+            row,
+            col,
+        )
+        for row, col, height, width in iter_tiles(
+            (len(y_values), len(x_values)), tile_size
+        )
+    ]
+    if processes and processes > 1:
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            list(executor.map(_fill_tile, tasks))
+    else:
+        for task in tasks:
+            _fill_tile(task)
+
+    key_path.unlink(missing_ok=True)
+    os.replace(tmp_path, output_path)
+    key_path.write_text(key)
+    return np.load(output_path, mmap_mode="r")
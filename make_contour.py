@@ -1,52 +1,126 @@
+import argparse
+import hashlib
+import math
+from pathlib import Path
+
 import numpy as np
 import matplotlib.pyplot as plt
 
+from gaussian_field import (
+    CACHE_DIR,
+    GAUSSIANS,
+    field_key,
+    gaussian_density,
+    load_gaussians_csv,
+    mixture_grid,
+    mixture_grid_tiled,
+)
+
+# 플롯의 범위와 해상도 설정
+X_RANGE = (-5, 5)
+Y_RANGE = (-5, 5)
+RESOLUTION = 100
+CONTOUR_LEVELS = 20
+CONTOUR_CMAP = "viridis"
+FIGURE_SIZE = 5
+
 
 # 가우시안 분포를 생성하는 함수
 def generate_gaussian(x, y, mean, covariance):
-    xy = np.stack([x.flatten(), y.flatten()]).T
-    inv_cov = np.linalg.inv(covariance)
-    n = mean.shape[0]
-    diff = xy - mean
-    exp_term = np.einsum("...k,kl,...l->...", diff, inv_cov, diff)
-    return np.exp(-0.5 * exp_term).reshape(x.shape)
-
-
-# 플롯의 크기와 해상도 설정
-x, y = np.meshgrid(np.linspace(-5, 5, 100), np.linspace(-5, 5, 100))
-
-# 여러 가우시안 분포의 평균과 공분산 정의
-gaussians = [
-    (np.array([0, 0]), np.array([[1, 0], [0, 1]])),
-    (np.array([2, 2]), np.array([[0.5, 0.3], [0.3, 0.5]])),
-    (np.array([-2, -1]), np.array([[0.5, 0], [0, 0.5]])),
-    (np.array([1, -3]), np.array([[0.3, -0.1], [-0.1, 0.3]])),
-    (np.array([-3, 2]), np.array([[0.4, 0.3], [0.3, 0.4]])),
-    # 추가된 가우시안 분포들
-    (np.array([3, -2]), np.array([[0.2, 0], [0, 0.2]])),
-    (np.array([-2, 3]), np.array([[0.3, 0.2], [0.2, 0.3]])),
-    (np.array([0, 3]), np.array([[0.4, -0.1], [-0.1, 0.4]])),
-    (np.array([-3, -3]), np.array([[0.5, 0.1], [0.1, 0.5]])),
-    (np.array([3, 3]), np.array([[0.3, 0], [0, 0.3]])),
-    (np.array([-1, 4]), np.array([[0.4, 0.2], [0.2, 0.4]])),
-    (np.array([4, -1]), np.array([[0.6, -0.2], [-0.2, 0.6]])),
-    (np.array([-4, -4]), np.array([[0.3, 0.1], [0.1, 0.3]])),
-    (np.array([4, 4]), np.array([[0.5, -0.1], [-0.1, 0.5]])),
-]
-
-# 가우시안 분포의 합을 계산하여 지자기 맵 표현
-magnetic_map = np.zeros(x.shape)
-for mean, covariance in gaussians:
-    magnetic_map += generate_gaussian(x, y, mean, covariance)
+    return gaussian_density(x, y, mean, np.linalg.inv(covariance))
+
 
 # 등고선 플롯으로 지자기 맵 표현
-plt.figure(figsize=(5, 5))
-plt.contourf(x, y, magnetic_map, levels=20, cmap="viridis")
-plt.axis("off")
-plt.gca().set_position([0, 0, 1, 1])
-plt.gca().set_axis_off()
-plt.subplots_adjust(top=1, bottom=0, right=1, left=0, hspace=0, wspace=0)
-plt.margins(0, 0)
-plt.gca().xaxis.set_major_locator(plt.NullLocator())
-plt.gca().yaxis.set_major_locator(plt.NullLocator())
-plt.savefig("magnetic_map.png")
+def save_contour_png(magnetic_map, x, y, output_path, dpi=100):
+    plt.figure(figsize=(FIGURE_SIZE, FIGURE_SIZE))
+    plt.contourf(x, y, magnetic_map, levels=CONTOUR_LEVELS, cmap=CONTOUR_CMAP)
+    plt.axis("off")
+    plt.gca().set_position([0, 0, 1, 1])
+    plt.gca().set_axis_off()
+    plt.subplots_adjust(top=1, bottom=0, right=1, left=0, hspace=0, wspace=0)
+    plt.margins(0, 0)
+    plt.gca().xaxis.set_major_locator(plt.NullLocator())
+    plt.gca().yaxis.set_major_locator(plt.NullLocator())
+    plt.savefig(output_path, dpi=dpi)
+    plt.close()
+
+
+def make_magnetic_map(
+    output_path="magnetic_map.png",
+    gaussians=GAUSSIANS,
+    x_range=X_RANGE,
+    y_range=Y_RANGE,
+    resolution=RESOLUTION,
+    tile_size=None,
+    processes=None,
+    dpi=100,
+    cutoff=None,
+):
+    # 필드와 등고선 설정이 바뀌지 않았으면 PNG 를 다시 만들지 않는다
+    key = (
+        f"{field_key(gaussians, x_range, y_range, resolution, cutoff)}"
+        f"-{CONTOUR_LEVELS}-{CONTOUR_CMAP}-{dpi}"
+    )
+    # 같은 이름의 다른 디렉터리 출력과 구분되도록 절대 경로의 해시를 붙인다
+    resolved = Path(output_path).resolve()
+    path_digest = hashlib.sha256(str(resolved).encode()).hexdigest()[:16]
+    stamp_path = CACHE_DIR / f"{resolved.name}.{path_digest}.key"
+    if (
+        Path(output_path).exists()
+        and stamp_path.exists()
+        and stamp_path.read_text() == key
+    ):
+        return False
+
+    # 가우시안 분포의 합을 계산하여 지자기 맵 표현
+    if tile_size:
+        # 큰 그리드는 블록 단위로 memmap 에 계산
+        magnetic_map = mixture_grid_tiled(
+            gaussians,
+            x_range,
+            y_range,
+            resolution,
+            tile_size=tile_size,
+            processes=processes,
+            cutoff=cutoff,
+        )
+    else:
+        magnetic_map = mixture_grid(
+            gaussians, x_range, y_range, resolution, cutoff=cutoff
+        )
+
+    # 출력 PNG 의 픽셀 수보다 촘촘한 그리드는 간격을 두고 읽어 등고선을 그린다
+    step = max(1, math.ceil(max(magnetic_map.shape) / (FIGURE_SIZE * dpi)))
+    x_values = np.linspace(*x_range, magnetic_map.shape[1])[::step]
+    y_values = np.linspace(*y_range, magnetic_map.shape[0])[::step]
+    x, y = np.meshgrid(x_values, y_values)
+    save_contour_png(np.asarray(magnetic_map[::step, ::step]), x, y, output_path, dpi)
+
+    stamp_path.parent.mkdir(parents=True, exist_ok=True)
+    stamp_path.write_text(key)
+    return True
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--output", default="magnetic_map.png")
+    parser.add_argument("--resolution", type=int, default=RESOLUTION)
+    parser.add_argument("--tile-size", type=int, default=None)
+    parser.add_argument("--processes", type=int, default=None)
+    parser.add_argument("--dpi", type=int, default=100)
+    # 측량 데이터 CSV 에서 가우시안 목록을 읽는다
+    parser.add_argument("--gaussians-csv", default=None)
+    # 각 성분을 계산할 마할라노비스 거리 (지정하면 잘린 범위에서만 계산)
+    parser.add_argument("--cutoff", type=float, default=None)
+    args = parser.parse_args()
+    make_magnetic_map(
+        args.output,
+        gaussians=(
+            load_gaussians_csv(args.gaussians_csv) if args.gaussians_csv else GAUSSIANS
+        ),
+        resolution=args.resolution,
+        tile_size=args.tile_size,
+        processes=args.processes,
+        dpi=args.dpi,
+        cutoff=args.cutoff,
+    )
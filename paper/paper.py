@@ -1,8 +1,230 @@
+import sys
+from pathlib import Path
+
 from manim import *
 import numpy as np
 from PIL import Image
 
+# 저장소 루트의 공용 모듈 (text_cache 등) 을 불러오기 위해 경로 추가
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import preview
+from render_profile import profiled
+from text_cache import cached_text
+
+
+def square_points(centers, side):
+    # 정사각형마다 set_points_as_corners 와 같은 점 배치 (UR, UL, DL, DR, UR) 를
+    # 한 번에 계산해 (N, 16, 3) 배열로 반환
+    corners = np.array([[1, 1], [-1, 1], [-1, -1], [1, -1], [1, 1]]) * side / 2
+    corners = centers[:, None, :2] + corners[None]
+    corners = np.concatenate([corners, np.zeros(corners.shape[:2] + (1,))], axis=2)
+    starts, ends = corners[:, :-1], corners[:, 1:]
+    segments = np.stack(
+        [starts, starts + (ends - starts) / 3, starts + 2 * (ends - starts) / 3, ends],
+        axis=2,
+    )
+    return segments.reshape(len(centers), -1, 3)
+
+
+class PixelGrid(VGroup):
+    # 픽셀 색과 중심 좌표를 NumPy 배열로 저장하는 픽셀 그리드.
+    # 각 패치는 VGroup 으로 남아 있어 패치 단위 애니메이션을 그대로 쓸 수 있고,
+    # 패치 안에서 같은 색인 픽셀들은 여러 subpath 를 가진 VMobject 하나로 묶는다.
+    def __init__(
+        self,
+        array,
+        patch_size=4,
+        height=3,
+        stroke_width=1,
+        stroke_opacity=0.0,
+        **kwargs,
+    ):
+        super().__init__(**kwargs)
+        array = np.asarray(array)[:, :, :3]
+        rows, cols = array.shape[:2]
+        self.patch_size = patch_size
+        self.colors = array / 255
+        # RGB 값이 (0, 0, 0) 인 픽셀은 투명하게 채운다
+        self.filled = array.sum(axis=2) != 0
+        self.pixel_size = height / rows
+        j, i = np.meshgrid(np.arange(cols), np.arange(rows))
+        self.centers = np.stack(
+            [
+                (j + 0.5 - cols / 2) * self.pixel_size,
+                (rows / 2 - i - 0.5) * self.pixel_size,
+                np.zeros((rows, cols)),
+            ],
+            axis=2,
+        )
+
+        for p_i in range(0, rows, patch_size):
+            for p_j in range(0, cols, patch_size):
+                block = np.s_[p_i : p_i + patch_size, p_j : p_j + patch_size]
+                self.add(
+                    self._create_patch(
+                        self.colors[block].reshape(-1, 3),
+                        self.filled[block].ravel(),
+                        self.centers[block].reshape(-1, 3),
+                    )
+                )
+        self.set_stroke(width=stroke_width, opacity=stroke_opacity)
+
+    def _create_patch(self, colors, filled, centers):
+        patch = VGroup()
+        points = square_points(centers, self.pixel_size)
+        # 투명 픽셀은 색을 따로 구분하지 않는다
+        keys = np.where(filled[:, None], colors, -1)
+        unique_keys, inverse = np.unique(keys, axis=0, return_inverse=True)
+        for k, key in enumerate(unique_keys):
+            pixels = VMobject()
+            pixels.points = points[inverse.ravel() == k].reshape(-1, 3)
+            if key[0] < 0:
+                pixels.set_fill(opacity=0)
+            else:
+                pixels.set_fill(color=rgb_to_color(key), opacity=1.0)
+            patch.add(pixels)
+        return patch
+
+
+class FeedIntoModel(Animation):
+    # 여러 패치를 시차를 두고 model 옆 (next_to(model, direction)) 으로 옮기는 하나의 애니메이션.
+    # 도착한 패치는 숨기고, 애니메이션이 끝나면 장면에서 제거한다.
+    # lag_ratio=1 이면 패치들이 차례로 하나씩 이동한다.
+    def __init__(
+        self,
+        patches,
+        model,
+        direction=LEFT,
+        buff=0.1,
+        lag_ratio=1.0,
+        patch_rate_func=smooth,
+        **kwargs,
+    ):
+        self.patches = list(patches)
+        self.model = model
+        self.direction = direction
+        self.buff = buff
+        self.patch_rate_func = patch_rate_func
+        super().__init__(
+            VGroup(*self.patches), lag_ratio=lag_ratio, rate_func=linear, **kwargs
+        )
 
+    def create_starting_mobject(self):
+        # 시작 위치는 begin 에서 배열로 저장하므로 패치를 복사하지 않는다
+        return self.mobject
+
+    def begin(self):
+        count = len(self.patches)
+        self.window = 1 / (1 + (count - 1) * self.lag_ratio)
+        self.starts = np.arange(count) * self.lag_ratio * self.window
+        self.start_centers = np.array([patch.get_center() for patch in self.patches])
+        anchor = (
+            self.model.get_critical_point(self.direction) + self.buff * self.direction
+        )
+        self.target_centers = np.array(
+            [
+                anchor
+                - (patch.get_critical_point(-self.direction) - patch.get_center())
+                for patch in self.patches
+            ]
+        )
+        self.arrived = np.zeros(count, dtype=bool)
+        super().begin()
+
+    def interpolate_mobject(self, alpha):
+        progress = np.clip((alpha - self.starts) / self.window, 0, 1)
+        for k in np.flatnonzero((progress > 0) & ~self.arrived):
+            t = self.patch_rate_func(progress[k])
+            self.patches[k].move_to(
+                interpolate(self.start_centers[k], self.target_centers[k], t)
+            )
+            if progress[k] >= 1:
+                self.patches[k].set_opacity(0)
+                self.arrived[k] = True
+
+    def clean_up_from_scene(self, scene):
+        super().clean_up_from_scene(scene)
+        scene.remove(self.mobject, *self.patches)
+
+
+class GridReshape(Animation):
+    # 셀 (패치) 들을 새 배치로 옮기는 애니메이션.
+    # 모든 셀의 중심과 축별 배율을 배열로 보간하고, 모든 점을 한 번의 배열 연산으로 갱신한다.
+    # target_centers 는 (N, 3) 목표 중심, target_scales 는 (3,) 또는 (N, 3) 축별 배율.
+    # start_handle, end_handle 을 주면 각 셀은 그 오프셋을 제어점으로 하는 3차 베지어를 따라 움직인다.
+    def __init__(
+        self,
+        cells,
+        target_centers,
+        target_scales=(1, 1, 1),
+        start_handle=None,
+        end_handle=None,
+        lag_ratio=0.0,
+        cell_rate_func=smooth,
+        **kwargs,
+    ):
+        self.cells = list(cells)
+        self.target_centers = np.asarray(target_centers, dtype=float)
+        self.target_scales = np.broadcast_to(
+            np.asarray(target_scales, dtype=float), self.target_centers.shape
+        )
+        self.start_handle = start_handle
+        self.end_handle = end_handle
+        self.cell_rate_func = cell_rate_func
+        super().__init__(
+            VGroup(*self.cells), lag_ratio=lag_ratio, rate_func=linear, **kwargs
+        )
+
+    def create_starting_mobject(self):
+        # 시작 상태는 begin 에서 배열로 저장하므로 셀을 복사하지 않는다
+        return self.mobject
+
+    def begin(self):
+        count = len(self.cells)
+        self.window = 1 / (1 + (count - 1) * self.lag_ratio)
+        self.starts = np.arange(count) * self.lag_ratio * self.window
+        self.start_centers = np.array([cell.get_center() for cell in self.cells])
+        self.start_controls = self.start_centers + (
+            0 if self.start_handle is None else np.asarray(self.start_handle)
+        )
+        self.end_controls = self.target_centers + (
+            0 if self.end_handle is None else np.asarray(self.end_handle)
+        )
+
+        self.point_mobjects = []
+        owners = []
+        points = []
+        for k, cell in enumerate(self.cells):
+            for mob in cell.family_members_with_points():
+                self.point_mobjects.append(mob)
+                owners.append(np.full(len(mob.points), k))
+                points.append(mob.points)
+        self.owner = np.concatenate(owners)
+        self.offsets = np.concatenate(points) - self.start_centers[self.owner]
+        self.splits = np.cumsum([len(mob.points) for mob in self.point_mobjects])[:-1]
+        super().begin()
+
+    def interpolate_mobject(self, alpha):
+        progress = np.clip((alpha - self.starts) / self.window, 0, 1)
+        t = progress.copy()
+        for k in np.flatnonzero((progress > 0) & (progress < 1)):
+            t[k] = self.cell_rate_func(progress[k])
+        t = t[:, None]
+        centers = (
+            (1 - t) ** 3 * self.start_centers
+            + 3 * (1 - t) ** 2 * t * self.start_controls
+            + 3 * (1 - t) * t**2 * self.end_controls
+            + t**3 * self.target_centers
+        )
+        scales = 1 + (self.target_scales - 1) * t
+        points = centers[self.owner] + self.offsets * scales[self.owner]
+        for mob, mob_points in zip(self.point_mobjects, np.split(points, self.splits)):
+            mob.points = mob_points
+
+
+@profiled("create_pixel_grid_patch")
+@preview.previewable
 class ImageScene(ThreeDScene):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
@@ -17,36 +239,13 @@ class ImageScene(ThreeDScene):
         return np.array(image)[:, :, :3]
 
     def create_pixel_grid_patch(self, array, opacity=0.0, patch_size=4, stroke_width=1):
-        height, width, _ = array.shape
-        patch_groups = VGroup()
-
-        for p_i in range(0, height, patch_size):
-            for p_j in range(0, width, patch_size):
-                pixel_grid = VGroup()  # 각 패치별 비주얼 그룹 생성
-                for i in range(p_i, p_i + patch_size):
-                    for j in range(p_j, p_j + patch_size):
-                        value = array[i, j]
-                        color = value / 255
-                        if np.sum(value) == 0:  # RGB 값이 (0, 0, 0)인 경우
-                            pixel = Square(side_length=1, fill_opacity=0)
-                        else:
-                            pixel = Square(side_length=1, fill_opacity=1.0)
-                            pixel.set_fill(
-                                color=rgb_to_color(color), opacity=1.0
-                            )  # 일반적인 경우 색상 설정
-                        pixel.move_to(
-                            ((j - p_j) - patch_size / 2) * RIGHT
-                            + ((i - p_i) - patch_size / 2) * DOWN
-                        )
-                        pixel.set_stroke(width=stroke_width, opacity=opacity)
-                        pixel_grid.add(pixel)
-                pixel_grid.move_to(
-                    ((p_j + patch_size / 2) - width / 2) * RIGHT
-                    + ((p_i + patch_size / 2) - height / 2) * DOWN
-                )
-                patch_groups.add(pixel_grid)
-        patch_groups.scale_to_fit_height(self.image_height)
-        return patch_groups
+        return PixelGrid(
+            array,
+            patch_size=patch_size,
+            height=self.image_height,
+            stroke_width=preview.stroke_width(stroke_width),
+            stroke_opacity=opacity,
+        )
 
     def construct(self):
         pixel_values = self.get_pixel_value_array()
@@ -63,7 +262,7 @@ class ImageScene(ThreeDScene):
             prev_action_values, opacity=1, patch_size=1, stroke_width=0.3
         )
 
-        prev_action_text = Text("Previous Action", font_size=24).next_to(
+        prev_action_text = cached_text("Previous Action", font_size=24).next_to(
             prev_action_map, UP, buff=0.5
         )
 
@@ -82,11 +281,18 @@ class ImageScene(ThreeDScene):
             create_animations.append(Create(outline))
             fade_animations.append(FadeOut(outline))
 
+        # 미리보기에서는 앞의 몇 개만 애니메이션으로 보여준다
+        create_animations = preview.cap_animations(self, create_animations)
+        fade_animations = preview.cap_animations(self, fade_animations)
+
         # 모든 애니메이션을 한번에 실행
         self.play(AnimationGroup(*create_animations, lag_ratio=0), run_time=1)
         self.wait(0.5)  # Optional wait time between creation and fading out
         self.play(AnimationGroup(*fade_animations, lag_ratio=0), run_time=1)
 
+        # section_render.py 는 next_section 경계마다 구간을 나눠 병렬로 렌더링한다
+        self.next_section("stack_patches")
+
         # 카메라 방향을 점진적으로 변경
         self.move_camera(
             phi=60 * DEGREES,  # 위에서 내려다보는 각도
@@ -125,9 +331,11 @@ class ImageScene(ThreeDScene):
                 )
 
         # 모든 애니메이션을 동시에 실행
+        animations = preview.cap_animations(self, animations)
         self.play(AnimationGroup(*animations, lag_ratio=0.1), run_time=2)
         self.wait(1)
 
+        self.next_section("patches_to_model")
         arrow_animations = []
         fade_arrows = []
         for i, patch in enumerate(pixel_grid_patches):
@@ -141,27 +349,28 @@ class ImageScene(ThreeDScene):
                 self.move_camera(frame_center=end_pos, run_time=1)
                 center_arrow = arrow
 
+        arrow_animations = preview.cap_animations(self, arrow_animations)
         self.play(AnimationGroup(*arrow_animations, lag_ratio=0.1), run_time=1)
 
         model = Rectangle(height=3, width=2, color=BLUE).next_to(
             center_arrow, RIGHT, buff=1
         )
         model.rotate(PI / 2, axis=RIGHT)  # y축을 기준으로 90도 회전
-        model_text = Text("Model", color=WHITE).scale(0.5).move_to(model.get_center())
+        model_text = (
+            cached_text("Model", color=WHITE).scale(0.5).move_to(model.get_center())
+        )
         model_text.rotate(PI / 2, axis=RIGHT)  # Text도 같은 방향으로 회전
 
         self.play(Create(model), Write(model_text))
 
-        # 패치들이 모델로 이동하는 애니메이션
-        for patch, fade_arrow in zip(
-            pixel_grid_patches, fade_arrows
-        ):  # 패치와 화살표 애니메이션을 함께 처리
-            self.play(
-                patch.animate.next_to(model, LEFT, buff=0.1),  # 패치 이동
-                fade_arrow,  # 화살표 사라짐
-                run_time=0.1,
-            )
-            self.remove(patch)  # 패치 이동 후 제거
+        # 패치들이 모델로 이동하는 애니메이션 (패치마다 0.1초씩 순서대로, 한 번의 play 로)
+        self.play(
+            FeedIntoModel(pixel_grid_patches, model, buff=0.1),  # 패치 이동 후 제거
+            LaggedStart(
+                *preview.cap_animations(self, fade_arrows), lag_ratio=1
+            ),  # 화살표 사라짐
+            run_time=0.1 * preview.cap_count(num_patches),
+        )
 
         self.wait(1)
 
@@ -186,7 +395,7 @@ class ImageScene(ThreeDScene):
             obj=output_patches,  # 대상 객체
             text=r"Hidden Dim",  # 텍스트 라벨
             brace_direction=UP,  # 괄호 방향
-            label_constructor=Text,  # 라벨 생성자
+            label_constructor=cached_text,  # 라벨 생성자
             font_size=24,  # 폰트 크기
             buff=0.2,  # 괄호와 대상 객체 사이의 거리
         )
@@ -195,7 +404,7 @@ class ImageScene(ThreeDScene):
             obj=output_patches,  # 대상 객체
             text=r"Number of Patches",  # 텍스트 라벨
             brace_direction=RIGHT,  # 괄호 방향 (오른쪽)
-            label_constructor=Text,  # 여기서는 Text를 사용하면 됩니다, MathTex는 수학적 표현에 더 적합
+            label_constructor=cached_text,  # 여기서는 Text를 사용하면 됩니다, MathTex는 수학적 표현에 더 적합
             font_size=24,  # 폰트 크기
             buff=0.2,  # 괄호와 대상 객체 사이의 거리
         )
@@ -217,6 +426,7 @@ class ImageScene(ThreeDScene):
 
         self.wait(2)
 
+        self.next_section("prev_action_map")
         self.move_camera(frame_center=prev_action_map.get_center(), phi=0, run_time=3)
         self.play(FadeIn(prev_action_map), FadeIn(prev_action_text), run_time=1)
 
@@ -226,52 +436,48 @@ class ImageScene(ThreeDScene):
         )
 
         # 16 x 16 prev_action_map을 256 x 1로 flatten
-        pixel_animations = []
         base_x, base_y, base_z = prev_action_map[0].get_center()
         x_increment = 0.2
-        for i, patch in enumerate(prev_action_map):
-            start_pos = patch.get_center()
-            # 각 패치를 첫 번째 패치의 x, y 위치로, z 위치는 순차적으로 증가시키기
-            target_position = np.array([base_x + i * x_increment, base_y, base_z])
-            # Define the control points for the CubicBezier curve
-            start_anchor = patch.get_center()
-            start_handle = start_anchor + np.array([2, 2, 0])  # First control point
-            end_handle = target_position + np.array([-2, 2, 0])  # Second control point
-            end_anchor = target_position  # End point of the Bezier curve
-
-            # Create the CubicBezier curve
-            bezier_path = CubicBezier(
-                start_anchor, start_handle, end_handle, end_anchor
-            )
-
-            # Create an animation where the patch moves along the Bezier path
-            anim = MoveAlongPath(patch, bezier_path)
-            pixel_animations.append(anim)
-
-            if i == (16 * 16) // 2:
-                middle_pixel = patch
+        # 각 패치를 첫 번째 패치의 y, z 위치로, x 위치는 순차적으로 증가시키기
+        strip_centers = np.array(
+            [
+                [base_x + i * x_increment, base_y, base_z]
+                for i in range(len(prev_action_map))
+            ]
+        )
+        middle_pixel = prev_action_map[(16 * 16) // 2]
 
-        self.play(AnimationGroup(*pixel_animations, lag_ratio=0.01), run_time=3)
+        # 모든 패치를 베지어 경로 (제어점 오프셋 [2, 2, 0], [-2, 2, 0]) 를 따라 이동
+        self.play(
+            GridReshape(
+                prev_action_map,
+                strip_centers,
+                start_handle=np.array([2, 2, 0]),
+                end_handle=np.array([-2, 2, 0]),
+                lag_ratio=0.01,
+            ),
+            run_time=3,
+        )
 
         self.move_camera(zoom=0.2, frame_center=middle_pixel.get_center(), run_time=1)
 
-        # 패치를 아래로 이동시키면서 세로로 확장하는 애니메이션
-        pixel_expand_animations = []
-        for patch in prev_action_map:
-            target_position = patch.get_center() + DOWN * patch.height
-
-            move_animation = patch.animate.move_to(target_position)
-            scale_animation = patch.animate.scale(np.array([1, 3, 1]))
-
-            # 이동과 스케일링 애니메이션을 동시에 실행
-            pixel_expand_animations.append(
-                AnimationGroup(move_animation, scale_animation, lag_ratio=1)
-            )
-
-        self.play(AnimationGroup(*pixel_expand_animations, lag_ratio=0.01), run_time=2)
+        # 패치를 아래로 이동시키면서 세로로 확장하는 애니메이션 (이동과 스케일링을 동시에 실행)
+        expanded_centers = np.array(
+            [patch.get_center() + DOWN * patch.height for patch in prev_action_map]
+        )
+        self.play(
+            GridReshape(
+                prev_action_map,
+                expanded_centers,
+                target_scales=[1, 3, 1],
+                lag_ratio=0.01,
+            ),
+            run_time=2,
+        )
 
         self.wait(3)
 
+        self.next_section("action_model")
         center_pos = middle_pixel.get_center()
         end_pos = center_pos + np.array([0, 0, 8])
         center_arrow = Arrow(
@@ -287,7 +493,7 @@ class ImageScene(ThreeDScene):
         model = Rectangle(height=6, width=4, color=BLUE).next_to(
             center_arrow, UP, buff=0.5
         )
-        model_text = Text("Model", color=WHITE, font_size=36).move_to(
+        model_text = cached_text("Model", color=WHITE, font_size=36).move_to(
             model.get_center()
         )
 
@@ -296,16 +502,19 @@ class ImageScene(ThreeDScene):
         all_animations.append(Write(model_text))
 
         # 픽셀 패치가 모델로 이동하는 애니메이션 추가
+        patch_animations = []
         for patch in prev_action_map:
             move_to_model = patch.animate.move_to(model.get_center())
             fade_out = FadeOut(patch)
-            all_animations.append(
+            patch_animations.append(
                 AnimationGroup(move_to_model, fade_out, lag_ratio=0.05)
             )
+        all_animations += preview.cap_animations(self, patch_animations)
 
         # 모든 애니메이션을 한 번에 실행
         self.play(AnimationGroup(*all_animations, lag_ratio=0.01), run_time=3)
 
+        self.next_section("output_matrix")
         # 픽셀 패치들이 모델에 들어간 후의 새로운 출력 매트릭스 생성
         output_patches = VGroup(
             *[
@@ -331,13 +540,17 @@ class ImageScene(ThreeDScene):
 
         # 출력 매트릭스 설명 라벨
         brace_top = BraceLabel(
-            output_patches, "Hidden Dim: 512", UP, label_constructor=Text, font_size=24
+            output_patches,
+            "Hidden Dim: 512",
+            UP,
+            label_constructor=cached_text,
+            font_size=24,
         )
         brace_right = BraceLabel(
             output_patches,
             "Number of Patches: 256",
             RIGHT,
-            label_constructor=Text,
+            label_constructor=cached_text,
             font_size=24,
         )
         self.play(Create(brace_top), Create(brace_right))
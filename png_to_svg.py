@@ -1,6 +0,0 @@
-# png to svg
-
-import cairosvg
-
-# png 파일을 svg 파일로 변환
-cairosvg.png2svg(url="white_airplane.png", write_to="white_airplane.svg")
@@ -0,0 +1,100 @@
+# 장면을 고치며 빠르게 확인하기 위한 미리보기 모드.
+#
+#   PAPER_MANIM_PREVIEW=1 manim -ql paper/paper.py ImageScene
+#   PAPER_MANIM_PREVIEW=prev_action_map,action_model manim -ql paper/paper.py ImageScene
+#
+# 환경 변수가 설정되어 있으면 장면 코드가 아래 함수들을 통해
+#   - Surface 해상도를 PREVIEW_SURFACE_RESOLUTION 이하로 낮추고
+#   - 픽셀 테두리를 그리지 않고
+#   - 한 번에 실행하는 애니메이션 묶음을 PREVIEW_MAX_GROUP_SIZE 개로 줄이며
+#     (나머지는 프레임 없이 최종 상태만 적용)
+#   - 값이 section 이름 목록이면 @previewable 장면에서 그 section 만 렌더링한다.
+#     (첫 next_section 이전 구간의 이름은 "start")
+# 환경 변수가 없으면 모든 함수가 인자를 그대로 돌려주므로 같은 construct 로 최종 영상을 만든다.
+import functools
+import os
+
+PREVIEW_ENV = "PAPER_MANIM_PREVIEW"
+PREVIEW_SURFACE_RESOLUTION = 8
+PREVIEW_MAX_GROUP_SIZE = 12
+# section 을 고르지 않고 미리보기만 켜는 값
+ALL_SECTIONS = ("1", "on", "true", "all")
+
+
+def preview_enabled():
+    return bool(os.environ.get(PREVIEW_ENV))
+
+
+def selected_sections():
+    # 고른 section 이름 집합. 미리보기가 꺼져 있거나 모든 section 이면 None
+    value = os.environ.get(PREVIEW_ENV, "").strip()
+    if not value or value.lower() in ALL_SECTIONS:
+        return None
+    return {name.strip() for name in value.split(",") if name.strip()}
+
+
+def section_selected(name):
+    sections = selected_sections()
+    return sections is None or name in sections
+
+
+def surface_resolution(resolution):
+    # resolution 은 정수 또는 (u, v)
+    if not preview_enabled():
+        return resolution
+    if isinstance(resolution, (tuple, list)):
+        return tuple(min(r, PREVIEW_SURFACE_RESOLUTION) for r in resolution)
+    return min(resolution, PREVIEW_SURFACE_RESOLUTION)
+
+
+def stroke_width(width):
+    return 0 if preview_enabled() else width
+
+
+def cap_count(count):
+    return min(count, PREVIEW_MAX_GROUP_SIZE) if preview_enabled() else count
+
+
+def cap_animations(scene, animations):
+    # 앞의 PREVIEW_MAX_GROUP_SIZE 개만 돌려주고, 나머지는 프레임 없이 끝난 상태로 만든다.
+    # 이후 장면 상태 (mobject 위치, 추가/제거 여부) 는 전체를 실행했을 때와 같다.
+    animations = list(animations)
+    limit = cap_count(len(animations))
+    if limit == len(animations):
+        return animations
+
+    from manim.animation.animation import prepare_animation
+
+    for animation in map(prepare_animation, animations[limit:]):
+        animation._setup_scene(scene)
+        animation.begin()
+        animation.finish()
+        animation.clean_up_from_scene(scene)
+    return animations[:limit]
+
+
+def previewable(scene_class):
+    # 장면 클래스 데코레이터. 고른 section 이 없으면 클래스를 그대로 돌려준다.
+    if selected_sections() is None:
+        return scene_class
+
+    setup = scene_class.setup
+    next_section = scene_class.next_section
+
+    @functools.wraps(setup)
+    def preview_setup(self, *args, **kwargs):
+        # 첫 next_section 이전 구간은 manim 이 자동으로 만든 section 에 해당
+        if not section_selected("start"):
+            self.renderer.file_writer.sections[-1].skip_animations = True
+        return setup(self, *args, **kwargs)
+
+    @functools.wraps(next_section)
+    def preview_next_section(self, name="unnamed", *args, **kwargs):
+        kwargs["skip_animations"] = kwargs.get(
+            "skip_animations", False
+        ) or not section_selected(name)
+        return next_section(self, name, *args, **kwargs)
+
+    scene_class.setup = preview_setup
+    scene_class.next_section = preview_next_section
+    return scene_class
@@ -0,0 +1,51 @@
+# 렌더링된 section 영상을 내용 해시로 저장하는 디스크 캐시.
+# 전체 크기가 max_bytes 를 넘으면 가장 오래 사용되지 않은 영상부터 지운다.
+# keep 으로 넘긴 키 (지금 렌더링 중인 장면이 쓰는 영상) 는 지우지 않는다.
+import os
+import shutil
+from pathlib import Path
+
+RENDER_CACHE_DIR = Path(__file__).resolve().parent / ".render_cache"
+DEFAULT_MAX_BYTES = 2 * 1024**3
+
+
+class RenderCache:
+    def __init__(self, cache_dir=RENDER_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+
+    def path_for(self, key):
+        return self.cache_dir / f"{key}.mp4"
+
+    def get(self, key):
+        path = self.path_for(key)
+        if not path.exists():
+            return None
+        # 사용 시각을 갱신해 eviction 순서를 LRU 로 유지
+        os.utime(path)
+        return path
+
+    def put(self, key, video_path, keep=()):
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        path = self.path_for(key)
+        tmp_path = path.with_name(f"{key}.{os.getpid()}.tmp.mp4")
+        shutil.copyfile(video_path, tmp_path)
+        os.replace(tmp_path, path)
+        self.evict(keep={key, *keep})
+        return path
+
+    def evict(self, keep=()):
+        keep_paths = {self.path_for(key) for key in keep}
+        entries = sorted(
+            (entry.stat().st_mtime, entry.stat().st_size, entry)
+            for entry in self.cache_dir.glob("*.mp4")
+            if not entry.name.endswith(".tmp.mp4")
+        )
+        total = sum(size for _, size, _ in entries)
+        for _, size, entry in entries:
+            if total <= self.max_bytes:
+                break
+            if entry in keep_paths:
+                continue
+            entry.unlink(missing_ok=True)
+            total -= size
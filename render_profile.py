@@ -0,0 +1,292 @@
+# 장면 렌더링 시간이 어디에 쓰이는지 기록하는 프로파일러.
+#
+#   PAPER_MANIM_PROFILE=profile.json manim -ql paper/paper.py ImageScene
+#
+# 환경 변수가 설정되어 있으면 @profiled 로 표시한 장면의 play / wait / move_camera 호출,
+# 지정한 메서드 (create_pixel_grid_patch 등), 각 updater 와 프레임 기록 (write_frame) 의
+# 실행 시간, 프레임 수, mobject 수를 기록한다. 프로세스 전체 최대 RSS 는 보고서에 기록된다.
+#
+#   PAPER_MANIM_PROFILE=profile.json PAPER_MANIM_PROFILE_MEMORY=1 manim -ql ...
+#
+# 처럼 PAPER_MANIM_PROFILE_MEMORY 도 설정하면 tracemalloc 으로 항목마다 시작 시점보다
+# 늘어난 최대 할당량 (peak_mb) 도 잰다. tracemalloc 은 Python 코드를 몇 배 느리게 하므로
+# 시간을 볼 때와 메모리를 볼 때는 따로 실행한다 (보고서의 memory_tracing 으로 구분).
+# 결과는 JSON 과 flamegraph.pl / speedscope 에서 읽을 수 있는 folded stack 파일로 저장된다.
+#
+#   python render_profile.py compare old.json new.json
+#
+# 로 두 커밋의 보고서를 비교할 수 있다.
+import argparse
+import functools
+import inspect
+import json
+import os
+import resource
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
+
+PROFILE_ENV = "PAPER_MANIM_PROFILE"
+MEMORY_ENV = "PAPER_MANIM_PROFILE_MEMORY"
+
+
+def peak_rss_mb():
+    # 리눅스의 ru_maxrss 는 KB 단위
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class RenderProfiler:
+    def __init__(self, scene_name, trace_memory=False):
+        self.scene_name = scene_name
+        self.trace_memory = trace_memory
+        self.origin = time.perf_counter()
+        self.events = []
+        self.stack = []
+        # 열려 있는 측정 구간마다 [시작 시 할당량, 지금까지의 최대 할당량] (바이트)
+        self.peaks = []
+
+    def begin_peak(self):
+        # 바깥 구간의 최대값을 보존한 뒤 tracemalloc 의 peak 를 새 구간 기준으로 초기화
+        if not self.trace_memory:
+            return
+        current, peak = tracemalloc.get_traced_memory()
+        if self.peaks:
+            self.peaks[-1][1] = max(self.peaks[-1][1], peak)
+        tracemalloc.reset_peak()
+        self.peaks.append([current, current])
+
+    def end_peak(self):
+        # 이 구간에서 시작 시점보다 늘어난 최대 할당량 (MB) 을 반환하고 바깥 구간에 반영.
+        # 메모리를 추적하지 않으면 None
+        if not self.trace_memory:
+            return None
+        start, peak = self.peaks.pop()
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        if self.peaks:
+            self.peaks[-1][1] = max(self.peaks[-1][1], peak)
+        return (peak - start) / 2**20
+
+    @contextmanager
+    def span(self, name, kind):
+        event = {
+            "name": name,
+            "kind": kind,
+            "start": time.perf_counter() - self.origin,
+            "wall": 0.0,
+            "children": [],
+        }
+        (self.stack[-1]["children"] if self.stack else self.events).append(event)
+        self.stack.append(event)
+        self.begin_peak()
+        try:
+            yield event
+        finally:
+            peak_mb = self.end_peak()
+            if peak_mb is not None:
+                event["peak_mb"] = peak_mb
+            self.stack.pop()
+            event["wall"] = time.perf_counter() - self.origin - event["start"]
+
+    def add_time(self, name, kind, seconds, peak_mb=None):
+        # updater 나 write_frame 처럼 매 프레임 호출되는 항목은 현재 span 아래에 합산.
+        # peak_mb 는 호출들 중 최대값을 남긴다.
+        children = self.stack[-1]["children"] if self.stack else self.events
+        for child in children:
+            if child["name"] == name and child["kind"] == kind:
+                child["wall"] += seconds
+                child["calls"] += 1
+                if peak_mb is not None:
+                    child["peak_mb"] = max(child["peak_mb"], peak_mb)
+                return
+        child = {"name": name, "kind": kind, "wall": seconds, "calls": 1}
+        if peak_mb is not None:
+            child["peak_mb"] = peak_mb
+        child["children"] = []
+        children.append(child)
+
+    def folded_lines(self):
+        # "scene;span;child <microseconds>" 형식, 자식 시간을 뺀 self time 을 기록
+        def walk(events, prefix):
+            for event in events:
+                stack = f"{prefix};{event['kind']} {event['name']}".replace("\n", " ")
+                child_wall = sum(child["wall"] for child in event["children"])
+                self_us = int(max(event["wall"] - child_wall, 0) * 1e6)
+                if self_us:
+                    yield f"{stack} {self_us}"
+                yield from walk(event["children"], stack)
+
+        yield from walk(self.events, self.scene_name)
+
+    def write(self, path):
+        path = Path(path)
+        report = {
+            "scene": self.scene_name,
+            "total_wall": time.perf_counter() - self.origin,
+            "peak_rss_mb": peak_rss_mb(),
+            "memory_tracing": self.trace_memory,
+            "events": self.events,
+        }
+        path.write_text(json.dumps(report, indent=2))
+        path.with_suffix(".folded").write_text("\n".join(self.folded_lines()) + "\n")
+
+
+def _describe_play(args):
+    names = []
+    for arg in args:
+        animation = getattr(arg, "animation", arg)
+        names.append(type(animation).__name__)
+    return ", ".join(names)
+
+
+def _wrap_scene_call(method, kind):
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        profiler = self.render_profiler
+        renderer = self.renderer
+        name = _describe_play(args) if kind == "play" else method.__name__
+        start_time = renderer.time
+        with profiler.span(f"#{renderer.num_plays} {name}", kind) as event:
+            result = method(self, *args, **kwargs)
+        from manim import config
+
+        event["frames"] = round((renderer.time - start_time) * config.frame_rate)
+        event["mobjects"] = len(self.get_mobject_family_members())
+        return result
+
+    return wrapper
+
+
+def _wrap_method(method):
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self.render_profiler.span(method.__name__, "method"):
+            return method(self, *args, **kwargs)
+
+    return wrapper
+
+
+def _profiled_update(profiler):
+    # Mobject.update 와 같은 동작이지만 updater 마다 시간을 잰다
+    def update(self, dt=0, recursive=True):
+        if self.updating_suspended:
+            return self
+        for updater in self.updaters:
+            profiler.begin_peak()
+            start = time.perf_counter()
+            if "dt" in inspect.signature(updater).parameters:
+                updater(self, dt)
+            else:
+                updater(self)
+            seconds = time.perf_counter() - start
+            profiler.add_time(
+                getattr(updater, "__qualname__", repr(updater)),
+                "updater",
+                seconds,
+                profiler.end_peak(),
+            )
+        if recursive:
+            for submob in self.submobjects:
+                submob.update(dt, recursive)
+        return self
+
+    return update
+
+
+def _wrap_render(method, output_template):
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        from manim import Mobject
+
+        trace_memory = bool(os.environ.get(MEMORY_ENV))
+        self.render_profiler = profiler = RenderProfiler(
+            type(self).__name__, trace_memory
+        )
+        file_writer = self.renderer.file_writer
+        write_frame = file_writer.write_frame
+
+        def timed_write_frame(*frame_args, **frame_kwargs):
+            profiler.begin_peak()
+            start = time.perf_counter()
+            write_frame(*frame_args, **frame_kwargs)
+            seconds = time.perf_counter() - start
+            profiler.add_time("write_frame", "encode", seconds, profiler.end_peak())
+
+        original_update = Mobject.update
+        Mobject.update = _profiled_update(profiler)
+        file_writer.write_frame = timed_write_frame
+        started_tracing = trace_memory and not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start()
+        try:
+            with profiler.span(type(self).__name__, "render"):
+                return method(self, *args, **kwargs)
+        finally:
+            if started_tracing:
+                tracemalloc.stop()
+            Mobject.update = original_update
+            file_writer.write_frame = write_frame
+            output_path = Path(output_template.format(scene=type(self).__name__))
+            output_path.parent.mkdir(parents=True, exist_ok=True)
+            profiler.write(output_path)
+
+    return wrapper
+
+
+def profiled(*method_names):
+    # 장면 클래스 데코레이터. PAPER_MANIM_PROFILE 이 없으면 클래스를 그대로 돌려준다.
+    def decorate(scene_class):
+        output = os.environ.get(PROFILE_ENV)
+        if not output:
+            return scene_class
+        # 디렉터리를 주면 장면마다 <scene>.json 으로 저장
+        if "{scene}" not in output and not output.endswith(".json"):
+            output = os.path.join(output, "{scene}.json")
+        output = os.path.abspath(output)
+
+        scene_class.render = _wrap_render(scene_class.render, output)
+        for kind in ("play", "wait", "move_camera"):
+            if hasattr(scene_class, kind):
+                setattr(
+                    scene_class,
+                    kind,
+                    _wrap_scene_call(getattr(scene_class, kind), kind),
+                )
+        for name in method_names:
+            setattr(scene_class, name, _wrap_method(getattr(scene_class, name)))
+        return scene_class
+
+    return decorate
+
+
+def _flatten(events, prefix=""):
+    totals = {}
+    for event in events:
+        key = f"{prefix}{event['kind']} {event['name']}"
+        totals[key] = totals.get(key, 0.0) + event["wall"]
+        for child_key, wall in _flatten(event["children"], key + " > ").items():
+            totals[child_key] = totals.get(child_key, 0.0) + wall
+    return totals
+
+
+def compare(old_path, new_path, out=sys.stdout):
+    old = json.loads(Path(old_path).read_text())
+    new = json.loads(Path(new_path).read_text())
+    old_totals = _flatten(old["events"])
+    new_totals = _flatten(new["events"])
+    print(f"{'old':>10} {'new':>10} {'delta':>8}  span", file=out)
+    for key in sorted(set(old_totals) | set(new_totals)):
+        before, after = old_totals.get(key, 0.0), new_totals.get(key, 0.0)
+        delta = f"{(after - before) / before:+.0%}" if before else "new"
+        print(f"{before:10.3f} {after:10.3f} {delta:>8}  {key}", file=out)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    compare_parser = subparsers.add_parser("compare")
+    compare_parser.add_argument("old")
+    compare_parser.add_argument("new")
+    args = parser.parse_args()
+    compare(args.old, args.new)
@@ -0,0 +1,233 @@
+# 장면을 next_section() 경계로 나눠 여러 프로세스에서 렌더링하고 하나의 영상으로 합친다.
+#
+#   python section_render.py paper/paper.py ImageScene -q l --workers 8
+#
+# 각 워커는 manim 의 -n 옵션으로 자기 구간 이전의 애니메이션을 건너뛰며
+# (프레임 없이 최종 상태만 계산) 장면 상태를 재현한 뒤 자기 구간만 렌더링한다.
+# 구간 영상은 ffmpeg concat 으로 재인코딩 없이 이어 붙인다.
+#
+# 각 section 은 그 안의 play 호출들의 해시 (mobject 상태 + 애니메이션 인자) 로
+# render_cache 에 저장되므로, 바뀌지 않은 section 은 다시 렌더링하지 않는다.
+# manim 의 해시는 큰 배열의 앞부분만 보므로, 점/픽셀 배열 전체와
+# 장면 디렉터리의 자산 파일 해시를 키에 함께 넣는다.
+import argparse
+import hashlib
+import importlib.util
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+from render_cache import DEFAULT_MAX_BYTES, RenderCache
+
+# 장면이 상대 경로로 읽는 자산 파일
+ASSET_SUFFIXES = (".png", ".jpg", ".svg", ".csv")
+
+
+def asset_digest(directory):
+    digest = hashlib.sha256()
+    for path in sorted(Path(directory).iterdir()):
+        if path.suffix in ASSET_SUFFIXES and path.is_file():
+            digest.update(path.name.encode())
+            digest.update(hashlib.sha256(path.read_bytes()).digest())
+    return digest.hexdigest()
+
+
+def mobject_digest(mobjects):
+    # 모든 family member 의 점과 (ImageMobject 의) 픽셀 배열 전체를 해시
+    digest = hashlib.sha256()
+    for mobject in mobjects:
+        for member in mobject.get_family():
+            digest.update(np.ascontiguousarray(member.points).tobytes())
+            pixel_array = getattr(member, "pixel_array", None)
+            if pixel_array is not None:
+                digest.update(np.ascontiguousarray(pixel_array).tobytes())
+    return digest.hexdigest()
+
+
+def load_scene_class(scene_file, scene_name):
+    scene_file = Path(scene_file).resolve()
+    sys.path.insert(0, str(scene_file.parent))
+    spec = importlib.util.spec_from_file_location(scene_file.stem, scene_file)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return getattr(module, scene_name)
+
+
+def plan_sections(scene_file, scene_name, quality="l"):
+    # 애니메이션을 건너뛰는 dry run 으로 construct 를 실행해
+    # 각 section 이 시작하는 play 번호와 section 안의 play 호출 해시를 기록한다.
+    # 반환값: [(name, first_play, last_play, key), ...]
+    from manim import tempconfig
+    from manim.utils.hashing import get_hash_from_play_call
+
+    scene_class = load_scene_class(scene_file, scene_name)
+    starts = [("start", 0)]
+    play_hashes = []
+
+    class SectionProbe(scene_class):
+        def next_section(self, name="unnamed", *args, **kwargs):
+            starts.append((name, self.renderer.num_plays))
+            super().next_section(name, *args, **kwargs)
+
+        def play(self, *args, **kwargs):
+            animation_kwargs = {
+                k: v for k, v in kwargs.items() if not k.startswith("subcaption")
+            }
+            animations = self.compile_animations(*args, **animation_kwargs)
+            play_hashes.append(
+                get_hash_from_play_call(
+                    self, self.renderer.camera, animations, self.mobjects
+                )
+                + mobject_digest(
+                    self.mobjects + [animation.mobject for animation in animations]
+                )
+            )
+            super().play(*args, **kwargs)
+
+    with tempconfig({"dry_run": True, "disable_caching": True}):
+        scene = SectionProbe()
+        # dry_run 은 파일 출력만 끄므로, 프레임을 그리지 않도록 모든 play 를 건너뛴다
+        scene.renderer._original_skipping_status = True
+        scene.renderer.skip_animations = True
+        scene.render()
+        total = scene.renderer.num_plays
+
+    assets = asset_digest(Path(scene_file).parent)
+    bounds = [play for _, play in starts[1:]] + [total]
+    sections = []
+    for (name, first), end in zip(starts, bounds):
+        if end <= first:
+            continue
+        digest = hashlib.sha256(f"{scene_name}-{quality}-{assets}".encode())
+        for play_hash in play_hashes[first:end]:
+            digest.update(play_hash.encode())
+        sections.append((name, first, end - 1, digest.hexdigest()[:32]))
+    return sections
+
+
+def render_section(scene_file, scene_name, quality, index, first, last, work_dir):
+    media_dir = Path(work_dir) / f"section_{index:03d}"
+    output_name = f"section_{index:03d}"
+    subprocess.run(
+        [
+            sys.executable,
+            "-m",
+            "manim",
+            "render",
+            f"-q{quality}",
+            "-n",
+            f"{first},{last}",
+            "--media_dir",
+            str(media_dir),
+            "-o",
+            output_name,
+            Path(scene_file).name,
+            scene_name,
+        ],
+        cwd=Path(scene_file).parent,
+        check=True,
+    )
+    return next(media_dir.rglob(f"{output_name}.mp4"))
+
+
+def find_ffmpeg():
+    # manim 0.19 에서 config.ffmpeg_executable 이 없어졌으므로 PATH 에서 찾는다
+    ffmpeg = shutil.which("ffmpeg")
+    if ffmpeg is None:
+        raise RuntimeError("section_render.py needs ffmpeg on PATH to join sections")
+    return ffmpeg
+
+
+def concat_videos(video_paths, output_path, ffmpeg=None):
+    ffmpeg = ffmpeg or find_ffmpeg()
+    list_path = Path(output_path).with_suffix(".sections.txt")
+    with list_path.open("w", encoding="utf-8") as fp:
+        for path in video_paths:
+            fp.write(f"file 'file:{Path(path).resolve().as_posix()}'\n")
+    subprocess.run(
+        [
+            ffmpeg,
+            "-y",
+            "-f",
+            "concat",
+            "-safe",
+            "0",
+            "-i",
+            str(list_path),
+            "-loglevel",
+            "error",
+            "-c",
+            "copy",
+            "-an",
+            str(output_path),
+        ],
+        check=True,
+    )
+    list_path.unlink()
+
+
+def render_in_parallel(
+    scene_file,
+    scene_name,
+    quality="l",
+    workers=None,
+    output=None,
+    cache=None,
+):
+    # 구간을 모두 렌더링한 뒤에 실패하지 않도록 ffmpeg 를 먼저 확인
+    ffmpeg = find_ffmpeg()
+    workers = workers or os.cpu_count()
+    output = Path(output or f"{scene_name}.mp4").resolve()
+    cache = cache or RenderCache()
+    scene_file = Path(scene_file).resolve()
+    cwd = os.getcwd()
+    # 장면 파일은 이미지 등을 상대 경로로 읽으므로 그 디렉터리에서 계획한다
+    os.chdir(scene_file.parent)
+    try:
+        sections = plan_sections(scene_file, scene_name, quality)
+    finally:
+        os.chdir(cwd)
+
+    videos = [cache.get(key) for *_, key in sections]
+    # 새 구간을 저장하며 eviction 이 일어나도 이번에 이어 붙일 영상은 남겨 둔다
+    keep = {key for *_, key in sections}
+    missing = [index for index, video in enumerate(videos) if video is None]
+
+    def render_missing(index):
+        _, first, last, key = sections[index]
+        video = render_section(
+            scene_file, scene_name, quality, index, first, last, work_dir
+        )
+        return cache.put(key, video, keep)
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for index, video in zip(missing, executor.map(render_missing, missing)):
+                videos[index] = video
+        concat_videos(videos, output, ffmpeg)
+    return output
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("scene_file")
+    parser.add_argument("scene_name")
+    parser.add_argument("-q", "--quality", default="l", choices="lmhpk")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("-o", "--output", default=None)
+    parser.add_argument("--cache-size-mb", type=int, default=DEFAULT_MAX_BYTES >> 20)
+    args = parser.parse_args()
+    render_in_parallel(
+        args.scene_file,
+        args.scene_name,
+        args.quality,
+        args.workers,
+        args.output,
+        RenderCache(max_bytes=args.cache_size_mb << 20),
+    )
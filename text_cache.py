@@ -0,0 +1,66 @@
+# Text 등 글꼴 레이아웃과 SVG 파싱이 필요한 mobject 를 프로세스 전역으로 캐시한다.
+# 같은 (생성자, 문자열, 인자) 조합은 한 번만 만들고 이후에는 copy() 를 돌려준다.
+# 만든 mobject 는 .text_cache/ 에 pickle 로도 저장해 다른 장면, 다음 렌더링에서 재사용한다.
+import hashlib
+import os
+import pickle
+from pathlib import Path
+
+import manim
+from manim import Text
+
+TEXT_CACHE_DIR = Path(__file__).resolve().parent / ".text_cache"
+
+_prototypes = {}
+
+
+def _cache_key(constructor, args, kwargs):
+    spec = repr(
+        (
+            manim.__version__,
+            f"{constructor.__module__}.{constructor.__qualname__}",
+            args,
+            sorted(kwargs.items()),
+        )
+    )
+    return hashlib.sha256(spec.encode()).hexdigest()[:32]
+
+
+def _load(path):
+    try:
+        with path.open("rb") as fp:
+            return pickle.load(fp)
+    except Exception:
+        # 손상되었거나 다른 버전에서 만든 파일은 무시하고 다시 만든다
+        return None
+
+
+def _store(path, mobject):
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.stem}.{os.getpid()}.tmp")
+        with tmp_path.open("wb") as fp:
+            pickle.dump(mobject, fp, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+    except Exception:
+        pass
+
+
+def cached_mobject(constructor, *args, use_disk=True, **kwargs):
+    key = _cache_key(constructor, args, kwargs)
+    prototype = _prototypes.get(key)
+    if prototype is None:
+        path = TEXT_CACHE_DIR / f"{key}.pkl"
+        prototype = _load(path) if use_disk and path.exists() else None
+        if prototype is None:
+            prototype = constructor(*args, **kwargs)
+            if use_disk:
+                _store(path, prototype)
+        _prototypes[key] = prototype
+    return prototype.copy()
+
+
+def cached_text(text, **kwargs):
+    # Text(text, **kwargs) 와 같지만 캐시된 복사본을 돌려준다.
+    # BraceLabel 의 label_constructor 로도 쓸 수 있다.
+    return cached_mobject(Text, text, **kwargs)